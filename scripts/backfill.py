@@ -4,70 +4,19 @@ from claude_counter import *
 
 
 def scan_all_projects():
-    compiled_patterns = {
-        name: re.compile(pattern, re.IGNORECASE) for name, pattern in PATTERNS.items()
-    }
-    daily_counts = {name: defaultdict(int) for name in PATTERNS}
-    total_counts = {name: 0 for name in PATTERNS}
-    project_breakdown = defaultdict(lambda: defaultdict(int))
-    total_messages_per_day = defaultdict(int)
-    seen_message_ids = set()  # Track processed message IDs to avoid duplicates
-
     if not os.path.exists(CLAUDE_PROJECTS_BASE):
         print(f"Error: Projects directory not found at {CLAUDE_PROJECTS_BASE}")
         print("Set CLAUDE_PROJECTS env variable to your Claude projects path")
-        return daily_counts, project_breakdown, total_messages_per_day
+        return {name: {} for name in PATTERNS}, {}, {}
 
     print("Scanning all Claude projects...")
 
-    for project_dir in Path(CLAUDE_PROJECTS_BASE).iterdir():
-        if project_dir.is_dir() and not project_dir.name.startswith("."):
-            project_name = get_project_display_name(project_dir.name)
-
-            for jsonl_file in project_dir.glob("*.jsonl"):
-                try:
-                    with open(jsonl_file, "r") as f:
-                        for line in f:
-                            try:
-                                entry = json.loads(line)
-                                result = process_message_entry(entry, compiled_patterns)
-
-                                if not result:
-                                    continue
-
-                                msg_id = result["msg_id"]
-
-                                # Skip if we've already processed this message
-                                if msg_id in seen_message_ids:
-                                    continue
-
-                                seen_message_ids.add(msg_id)
-                                date_str = result["date_str"]
-
-                                # Count total assistant messages
-                                total_messages_per_day[date_str] += 1
+    jsonl_files = list(iter_jsonl_files())
 
-                                # Count pattern matches (once per message, not per text block)
-                                message_patterns = set()
-                                for text, matched_patterns in result["text_blocks"]:
-                                    message_patterns.update(matched_patterns.keys())
+    # Scan files in parallel, then merge in file order so deduplication is unchanged
+    file_messages = scan_all_files([jsonl_file for _, jsonl_file in jsonl_files])
 
-                                for pattern_name in message_patterns:
-                                    daily_counts[pattern_name][date_str] += 1
-                                    total_counts[pattern_name] += 1
-                                    if pattern_name == "absolutely":
-                                        project_breakdown[date_str][project_name] += 1
-
-                            except:
-                                continue
-                except:
-                    pass
-
-    for name, count in total_counts.items():
-        unique_days = len(daily_counts[name])
-        print(f"Found {count} '{name}' across {unique_days} days")
-
-    return daily_counts, project_breakdown, total_messages_per_day
+    return count_messages([project_name for project_name, _ in jsonl_files], file_messages)
 
 
 def main():
@@ -173,34 +122,25 @@ def main():
                 print("Upload cancelled.")
                 return
 
+            # Collect every day with pattern matches and send them in one request
+            records = build_upload_records(daily_counts, total_messages_per_day)
+
             print("Uploading to API...")
+            results = upload_to_api_bulk(api_url, secret, records)
             success = 0
             failed = 0
 
-            for date in sorted_dates:
-                # Collect all pattern counts for this date
-                date_patterns = {name: counts.get(date, 0) for name, counts in daily_counts.items()}
-                total_msgs = total_messages_per_day.get(date, 0)
+            for record, result in zip(records, results):
+                patterns_summary = ", ".join([f"{name}={record[name]:2d}" for name in daily_counts])
+                upload_text = f"  {record['day']}: {patterns_summary}, total={record['total_messages']:3d}"
+                print(f"{upload_text:<75}", end="")
 
-                # Only upload if there are any pattern matches
-                if any(date_patterns.values()):
-                    patterns_summary = ", ".join([f"{name}={count:2d}" for name, count in date_patterns.items()])
-                    upload_text = f"  Uploading {date}: {patterns_summary}, total={total_msgs:3d}..."
-                    print(f"{upload_text:<75}", end="")
-
-                    result = upload_to_api(
-                        api_url, secret, date, patterns_dict=date_patterns, total_messages=total_msgs
-                    )
-                    if result == True:
-                        print("✓")
-                        success += 1
-                    elif result == "STOP":
-                        print("✗")
-                        failed += 1
-                        break
-                    else:
-                        print("✗")
-                        failed += 1
+                if result == True:
+                    print("✓")
+                    success += 1
+                else:
+                    print("✗")
+                    failed += 1
 
             print("-" * 50)
             print(f"Upload complete: {success} successful, {failed} failed")
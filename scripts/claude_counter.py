@@ -1,21 +1,14 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
-import re
-import urllib.request
-import socket
-import subprocess
-import platform
-import logging
-from logging.handlers import TimedRotatingFileHandler
-from datetime import datetime, timezone
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
-CLAUDE_PROJECTS_BASE = os.environ.get(
-    "CLAUDE_PROJECTS", os.path.expanduser("~/.claude/projects")
-)
-DATA_DIR = os.path.expanduser("~/.absolutelyright")
+from counter_core import *
+
+DATA_DIR = BASE_DATA_DIR
+SCAN_CACHE_FILE = os.path.join(DATA_DIR, "scan_cache.sqlite")
 
 # Get script directory for logging and config
 SCRIPT_DIR = Path(__file__).parent
@@ -23,24 +16,8 @@ LOG_DIR = SCRIPT_DIR.parent / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 UPLOAD_LOG_FILE = LOG_DIR / "uploads.log"
 
-# Set up rotating logger for uploads
-upload_logger = logging.getLogger("uploads")
-upload_logger.setLevel(logging.INFO)
-
-# Only add handler if it hasn't been added yet (prevents duplicates on re-import)
-if not upload_logger.handlers:
-    upload_handler = TimedRotatingFileHandler(
-        UPLOAD_LOG_FILE,
-        when="midnight",
-        interval=1,
-        backupCount=7,  # Keep 7 days of logs
-        encoding="utf-8"
-    )
-    upload_handler.setFormatter(logging.Formatter('%(message)s'))
-    upload_logger.addHandler(upload_handler)
-
-# Prevent propagation to root logger (avoids potential duplicate logging)
-upload_logger.propagate = False
+# Set up rotating, buffered logger for uploads
+upload_logger = get_upload_logger("uploads", UPLOAD_LOG_FILE)
 
 # Load patterns and server URL from config
 CONFIG_FILE = SCRIPT_DIR / "patterns_config.json"
@@ -51,52 +28,23 @@ PATTERNS = CONFIG["patterns"]
 SERVER_URL = CONFIG.get("server_url", "http://localhost:3003")
 
 
-def get_workstation_id():
-    """Get a stable, friendly workstation identifier"""
-    # Check for environment variable first (allows manual override)
-    if os.environ.get("WORKSTATION_ID"):
-        return os.environ.get("WORKSTATION_ID")
+def pattern_names_from_mask(mask):
+    """Return the names of the patterns whose bits are set in `mask`, in config order"""
+    if not mask:
+        return ()
+    return tuple(name for name, bit in PATTERN_BITS.items() if mask & bit)
 
-    # On macOS, use LocalHostName (clean, stable, user-friendly)
-    if platform.system() == "Darwin":
-        try:
-            result = subprocess.run(
-                ["scutil", "--get", "LocalHostName"],
-                capture_output=True,
-                text=True,
-                timeout=1
-            )
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except:
-            pass
 
-    # Fallback to socket.gethostname() for other platforms
-    return socket.gethostname()
+# Compiled once at import (and once per worker process), reused by every scan
+PATTERN_NAMES = list(PATTERNS)
+# Bit i of a pattern mask is set when PATTERN_NAMES[i] matched
+PATTERN_BITS = {name: 1 << i for i, name in enumerate(PATTERN_NAMES)}
+ALL_PATTERNS_MASK = (1 << len(PATTERN_NAMES)) - 1
+PATTERN_MATCHER = build_pattern_matcher(PATTERNS)
 
-
-WORKSTATION_ID = get_workstation_id()
-
-
-def log_upload(api_url, data, status, response_text=None, error=None):
-    """Log upload attempts to file with automatic daily rotation"""
-    try:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = {
-            "timestamp": timestamp,
-            "url": api_url,
-            "data": {k: v for k, v in data.items() if k != "secret"},  # Don't log secret
-            "status": status,
-        }
-        if response_text:
-            log_entry["response"] = response_text
-        if error:
-            log_entry["error"] = str(error)
-
-        upload_logger.info(json.dumps(log_entry))
-    except Exception as e:
-        # Don't fail if logging fails
-        print(f"  Warning: Could not write to log: {e}")
+# Every assistant entry contains this token ("type": "assistant"), so a plain
+# byte search can skip all other lines before they're parsed as JSON
+ASSISTANT_MARKER = b'"assistant"'
 
 
 def upload_to_api(api_url, secret, date_str, patterns_dict=None, total_messages=None, **legacy_kwargs):
@@ -135,50 +83,95 @@ def upload_to_api(api_url, secret, date_str, patterns_dict=None, total_messages=
         if secret:
             data["secret"] = secret
 
-        req = urllib.request.Request(
-            f"{api_url}/api/set",
-            data=json.dumps(data).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-        )
-
-        with urllib.request.urlopen(req, timeout=5) as response:
-            response_text = response.read().decode("utf-8")
-            if response.status == 200:
-                log_upload(api_url, data, "success", response_text)
-                return True
-            elif response.status == 401:
-                log_upload(api_url, data, "unauthorized")
-                print(f"\n🚫 AUTHORIZATION FAILED!")
-                print(f"   Check your secret key and try again.")
-                return "STOP"
-            else:
-                log_upload(api_url, data, f"error_http_{response.status}")
-                print(f"  API error for {date_str}: {response.status}")
-                return False
-    except urllib.error.HTTPError as e:
-        if e.code == 401:
-            log_upload(api_url, data, "unauthorized", error=e)
+        status, response_text = post_json(f"{api_url}/api/set", data)
+        if status == 200:
+            log_upload(upload_logger, api_url, data, "success", response_text)
+            return True
+        elif status == 401:
+            log_upload(upload_logger, api_url, data, "unauthorized")
             print(f"\n🚫 AUTHORIZATION FAILED!")
             print(f"   Check your secret key and try again.")
             return "STOP"
         else:
-            log_upload(api_url, data, f"error_http_{e.code}", error=e)
-            print(f"  API error for {date_str}: HTTP {e.code}")
+            log_upload(upload_logger, api_url, data, f"error_http_{status}")
+            print(f"  API error for {date_str}: HTTP {status}")
             return False
     except Exception as e:
-        log_upload(api_url, data, "error_exception", error=e)
+        log_upload(upload_logger, api_url, data, "error_exception", error=e)
         print(f"  API error for {date_str}: {e}")
         return False
 
 
-def process_message_entry(entry, compiled_patterns):
+def upload_many(api_url, secret, records, max_workers=8):
+    """Upload days concurrently with one /api/set request each. Returns one result per record."""
+    def upload(record):
+        patterns_dict = {k: v for k, v in record.items() if k not in ("day", "total_messages")}
+        return upload_to_api(
+            api_url, secret, record["day"], patterns_dict=patterns_dict,
+            total_messages=record.get("total_messages")
+        )
+
+    return upload_concurrently(upload, records, max_workers)
+
+
+def upload_to_api_bulk(api_url, secret, records):
+    """
+    Upload many days in a single request. Returns one True/False/'STOP' per record.
+
+    Args:
+        api_url: API endpoint URL
+        secret: Optional API secret
+        records: List of dicts with "day", "total_messages" and pattern counts
+
+    Falls back to one upload_to_api() call per day when the server has no bulk
+    endpoint (404/405). The result list stops early if authorization fails.
+    """
+    if not api_url or not records:
+        return []
+
+    data = {
+        "workstation_id": WORKSTATION_ID,
+        "days": records,
+    }
+    if secret:
+        data["secret"] = secret
+
+    try:
+        status, response_text = post_json(f"{api_url}/api/set_bulk", data)
+    except Exception as e:
+        log_upload(upload_logger, api_url, data, "error_exception", error=e)
+        print(f"  API error for bulk upload: {e}")
+        return [False] * len(records)
+
+    if status == 200:
+        log_upload(upload_logger, api_url, data, "success", response_text)
+        return [True] * len(records)
+    elif status == 401:
+        log_upload(upload_logger, api_url, data, "unauthorized")
+        print(f"\n🚫 AUTHORIZATION FAILED!")
+        print(f"   Check your secret key and try again.")
+        return ["STOP"]
+    elif status in (404, 405):
+        # Older server without /api/set_bulk: upload day by day
+        return upload_many(api_url, secret, records)
+    else:
+        log_upload(upload_logger, api_url, data, f"error_http_{status}")
+        print(f"  API error for bulk upload: HTTP {status}")
+        return [False] * len(records)
+
+
+def process_message_entry(entry):
     """
     Process a single JSONL entry and extract message info + pattern matches.
 
+    Matches against the configured PATTERNS, compiled once at import.
+
     Returns dict with:
         - msg_id: The message UUID
         - date_str: Date in YYYY-MM-DD format
-        - text_blocks: List of (text, matched_patterns) tuples
+        - pattern_mask: Bits of every pattern matched in any text block
+          (see PATTERN_BITS)
+        - first_match_text: The first text block that matched, or None
     Returns None if entry should be skipped.
     """
     if entry.get("type") != "assistant":
@@ -188,51 +181,187 @@ def process_message_entry(entry, compiled_patterns):
     if not msg_id:
         return None
 
-    # Parse timestamp
+    # ISO 8601 timestamps start with YYYY-MM-DD, so slice instead of parsing.
+    # Interned so every message of a day shares one string: dict lookups on it
+    # hit the identity fast path, and pickled results store it once
     timestamp = entry.get("timestamp", "")
-    if timestamp:
-        entry_time = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-        date_str = entry_time.strftime("%Y-%m-%d")
+    if len(timestamp) >= 10:
+        date_str = sys.intern(timestamp[:10])
     else:
         date_str = get_utc_today()
 
-    # Extract text blocks and check for pattern matches
-    text_blocks = []
+    # Check text blocks for pattern matches; only the union is kept
+    message_mask = 0
+    first_match_text = None
     message = entry.get("message", {})
     if "content" in message:
         for content_item in message.get("content", []):
+            if message_mask == ALL_PATTERNS_MASK:
+                break  # Every pattern already matched in an earlier block
             if isinstance(content_item, dict) and content_item.get("type") == "text":
                 text = content_item.get("text", "")
 
-                # Check for pattern matches
-                matched_patterns = {}
-                for pattern_name, pattern_regex in compiled_patterns.items():
-                    if pattern_regex.search(text):
-                        matched_patterns[pattern_name] = True
+                # Check for pattern matches; texts without any match cost one scan.
+                # Bits are in PATTERN_NAMES order, the same as PATTERN_BITS
+                mask = match_pattern_mask(PATTERN_MATCHER, text)
 
-                text_blocks.append((text, matched_patterns))
+                if mask:
+                    message_mask |= mask
+                    if first_match_text is None:
+                        first_match_text = text
 
     return {
         "msg_id": msg_id,
         "date_str": date_str,
-        "text_blocks": text_blocks,
+        "pattern_mask": message_mask,
+        "first_match_text": first_match_text,
     }
 
 
-def get_project_display_name(project_dir_name):
-    name = project_dir_name
-    for prefix in ["-Users-", "-home-", "-var-"]:
-        if name.startswith(prefix):
-            parts = name.split("-", 3)
-            if len(parts) > 3:
-                name = parts[3]
-            break
-    return name
+# One scanned assistant message. A namedtuple keeps the records as compact as
+# plain tuples (no per-record dict) and they still pickle between processes
+ScannedMessage = namedtuple(
+    "ScannedMessage", ["msg_id", "date_str", "patterns", "first_match_text"]
+)
+
 
+def scan_message_entry(entry):
+    """
+    Turn one parsed JSONL entry into a ScannedMessage.
+
+    Each pattern is counted once per message. first_match_text is the first
+    matching text block, stripped and cut to 100 characters (None when
+    nothing matched). Returns None if the entry isn't an assistant message.
+    """
+    result = process_message_entry(entry)
+    if not result:
+        return None
 
-def get_utc_today():
-    """Get today's date in UTC (same format as JSONL timestamps)"""
-    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    first_match_text = result["first_match_text"]
+    if first_match_text is not None:
+        first_match_text = first_match_text.strip()[:100]
+
+    return ScannedMessage(
+        result["msg_id"],
+        result["date_str"],
+        pattern_names_from_mask(result["pattern_mask"]),
+        first_match_text,
+    )
+
+
+def scan_jsonl_file(filepath, state=None):
+    """
+    Scan one JSONL file for assistant messages and their pattern matches.
+
+    Returns a list of ScannedMessage records (see scan_message_entry()).
+    Runs inside worker processes, so it only returns plain, picklable values.
+
+    If `state` (a dict persisted between runs) is given, only lines appended
+    since the last scan are read (see iter_new_lines()).
+    """
+    messages = []
+
+    for line in iter_new_lines(filepath, state):
+        if ASSISTANT_MARKER not in line:
+            continue
+        try:
+            message = scan_message_entry(json_loads(line))
+            if message:
+                messages.append(message)
+        except:
+            continue
+
+    return messages
+
+
+def scan_all_files(file_list):
+    """
+    Scan JSONL files in parallel; returns one message list per file, in order.
+
+    Results are cached in SCAN_CACHE_FILE, so unchanged files aren't read
+    again on the next run (the cache is invalidated when PATTERNS or the
+    matching engine change).
+    """
+    ensure_data_dir()
+    cache_key = json.dumps([PATTERNS, matcher_engine(PATTERN_MATCHER)], sort_keys=True)
+    return scan_files_cached(scan_jsonl_file, file_list, SCAN_CACHE_FILE, cache_key)
+
+
+def count_messages(project_names, file_messages):
+    """
+    Merge scanned messages into daily counts, skipping duplicate message IDs.
+
+    `file_messages` holds one ScannedMessage list per file and
+    `project_names` the project of each file, in the same order; files are
+    merged in that order so deduplication doesn't depend on scan order.
+
+    Returns (daily_counts, project_breakdown, total_messages_per_day):
+        - daily_counts: pattern_name -> {date: count}
+        - project_breakdown: date -> {project_name: "absolutely" count}
+        - total_messages_per_day: date -> assistant message count
+    """
+    daily_counts = {name: {} for name in PATTERNS}
+    total_counts = {name: 0 for name in PATTERNS}
+    project_breakdown = defaultdict(lambda: defaultdict(int))
+    total_messages_per_day = {}
+    seen_message_ids = set()  # Track processed message IDs to avoid duplicates
+
+    # One counter row per date: a column per pattern (PATTERN_NAMES order) and
+    # a last column for the total message count, so each message costs a
+    # single date lookup instead of one dict update per pattern
+    pattern_index = {name: i for i, name in enumerate(PATTERN_NAMES)}
+    total_index = len(PATTERN_NAMES)
+    counts_by_date = {}
+
+    for project_name, messages in zip(project_names, file_messages):
+        for msg_id, date_str, message_patterns, _ in messages:
+            # Skip if we've already processed this message
+            key = message_key(msg_id)
+            if key in seen_message_ids:
+                continue
+
+            seen_message_ids.add(key)
+
+            row = counts_by_date.get(date_str)
+            if row is None:
+                row = counts_by_date[date_str] = [0] * (total_index + 1)
+
+            # Count total assistant messages
+            row[total_index] += 1
+
+            # Count pattern matches (once per message, not per text block)
+            for pattern_name in message_patterns:
+                row[pattern_index[pattern_name]] += 1
+                if pattern_name == "absolutely":
+                    project_breakdown[date_str][project_name] += 1
+
+    # Unpack the rows into the per-pattern and per-day dicts callers expect
+    for date_str, row in counts_by_date.items():
+        total_messages_per_day[date_str] = row[total_index]
+        for name, i in pattern_index.items():
+            if row[i]:
+                daily_counts[name][date_str] = row[i]
+                total_counts[name] += row[i]
+
+    for name, count in total_counts.items():
+        unique_days = len(daily_counts[name])
+        print(f"Found {count} '{name}' across {unique_days} days")
+
+    return daily_counts, project_breakdown, total_messages_per_day
+
+
+def build_upload_records(daily_counts, total_messages_per_day):
+    """Build upload_to_api_bulk() records for every day with at least one pattern match"""
+    records = []
+    for date in sorted(total_messages_per_day):
+        date_patterns = {name: counts.get(date, 0) for name, counts in daily_counts.items()}
+
+        # Only upload if there are any pattern matches
+        if any(date_patterns.values()):
+            records.append(
+                {"day": date, **date_patterns, "total_messages": total_messages_per_day[date]}
+            )
+    return records
 
 
 def ensure_data_dir():
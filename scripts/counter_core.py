@@ -0,0 +1,829 @@
+#!/usr/bin/env python3
+"""Shared helpers for the pattern counter and the prompt word counter."""
+import os
+import json
+import re
+import http.client
+import socket
+import subprocess
+import platform
+import logging
+import mmap
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from logging.handlers import MemoryHandler, TimedRotatingFileHandler
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+# orjson parses JSONL lines (as bytes) several times faster than the stdlib;
+# it's optional so the scripts keep working on a stock Python install
+try:
+    import orjson
+
+    json_loads = orjson.loads
+    json_dumps_bytes = orjson.dumps
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+    def json_dumps_bytes(obj):
+        return json.dumps(obj).encode("utf-8")
+
+# Hyperscan compiles every pattern into one SIMD automaton; also optional,
+# the combined `re` regex is used when it isn't installed
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# watchfiles (inotify/FSEvents) lets the watchers sleep until a session file
+# changes; without it they poll the projects tree every CHECK_INTERVAL seconds
+try:
+    import watchfiles
+except ImportError:
+    watchfiles = None
+
+CLAUDE_PROJECTS_BASE = os.environ.get(
+    "CLAUDE_PROJECTS", os.path.expanduser("~/.claude/projects")
+)
+# Root of the local data files; each counter keeps its own DATA_DIR under it
+BASE_DATA_DIR = os.path.expanduser("~/.absolutelyright")
+
+class JSONLineFormatter(logging.Formatter):
+    """Serialize the record's message (a dict) as one JSON line when it's written"""
+
+    def format(self, record):
+        return json_dumps(record.msg)
+
+
+def get_upload_logger(name, log_file):
+    """
+    Return the upload logger `name`, writing one JSON line per record to `log_file`.
+
+    The file rotates daily. Records are buffered so bulk uploads don't cost a
+    write per attempt; failures (WARNING) flush right away, and
+    close_upload_logger() (or logging.shutdown() at exit) flushes the rest.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+
+    # Only add handler if it hasn't been added yet (prevents duplicates on re-import)
+    if not logger.handlers:
+        file_handler = TimedRotatingFileHandler(
+            log_file,
+            when="midnight",
+            interval=1,
+            backupCount=7,  # Keep 7 days of logs
+            encoding="utf-8"
+        )
+        file_handler.setFormatter(JSONLineFormatter())
+        logger.addHandler(
+            MemoryHandler(capacity=128, flushLevel=logging.WARNING, target=file_handler)
+        )
+
+    # Prevent propagation to root logger (avoids potential duplicate logging)
+    logger.propagate = False
+    return logger
+
+
+def close_upload_logger(logger):
+    """Flush the buffered records of a get_upload_logger() logger to disk and close it"""
+    for handler in logger.handlers:
+        handler.flush()
+        handler.close()
+
+
+def log_upload(logger, api_url, data, status, response_text=None, error=None):
+    """Log an upload attempt to `logger` (see get_upload_logger())"""
+    try:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        log_entry = {
+            "timestamp": timestamp,
+            "url": api_url,
+            "data": {k: v for k, v in data.items() if k != "secret"},  # Don't log secret
+            "status": status,
+        }
+        if response_text:
+            log_entry["response"] = response_text
+        if error:
+            log_entry["error"] = str(error)
+
+        level = logging.INFO if status == "success" else logging.WARNING
+        # Serialized by JSONLineFormatter when the buffer is flushed
+        logger.log(level, log_entry)
+    except Exception as e:
+        # Don't fail if logging fails
+        print(f"  Warning: Could not write to log: {e}")
+
+
+def build_combined_regex(patterns):
+    """
+    Combine all patterns into a single alternation; group pN is the N-th pattern.
+
+    One search() with it tells whether any pattern matches a text at all.
+    It can't list every pattern that matches, because the alternation
+    consumes each match and patterns overlapping it are never tried there
+    (see match_pattern_mask()).
+    """
+    return re.compile(
+        "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(patterns.values())),
+        re.IGNORECASE,
+    )
+
+
+# Everything match_pattern_mask() needs for one pattern config, compiled once
+PatternMatcher = namedtuple(
+    "PatternMatcher", ["regexes", "combined", "hyperscan_database", "prefilter"]
+)
+
+
+def build_pattern_matcher(patterns):
+    """Compile `patterns` (name -> regex, matched case-insensitively) into a PatternMatcher"""
+    return PatternMatcher(
+        [re.compile(pattern, re.IGNORECASE) for pattern in patterns.values()],
+        build_combined_regex(patterns),
+        build_hyperscan_database(patterns),
+        build_literal_prefilter(patterns),
+    )
+
+
+def matcher_engine(matcher):
+    """Return the name of the engine match_pattern_mask() uses for `matcher`"""
+    return "re" if matcher.hyperscan_database is None else "hyperscan"
+
+
+def match_pattern_mask(matcher, text):
+    """
+    Return a bitmask of the patterns found in `text`: bit i is set when the
+    i-th pattern's search() matches, exactly as if each were searched alone.
+
+    Texts without a trigger literal are rejected by a substring check.
+    Hyperscan reports every pattern, overlapping or not, in one pass.
+    Otherwise the combined regex finds the first match; since it can hide
+    overlapping matches, every other pattern is then searched on its own.
+    """
+    if matcher.prefilter is not None:
+        lowered = fold_case(text)
+        if not any(literal in lowered for literal in matcher.prefilter):
+            return 0
+
+    if matcher.hyperscan_database is not None:
+        return hyperscan_mask(matcher.hyperscan_database, text)
+
+    first_match = matcher.combined.search(text)
+    if first_match is None:
+        return 0
+
+    first_index = int(first_match.lastgroup[1:])
+    mask = 1 << first_index
+    for i, regex in enumerate(matcher.regexes):
+        if i != first_index and regex.search(text):
+            mask |= 1 << i
+    return mask
+
+
+def _class_end(pattern, start):
+    """Return the index of the `]` closing the character class opened at `start`, or None."""
+    i = start + 1
+    # A `]` right after `[` or `[^` is a literal member of the class
+    if pattern.startswith("^", i):
+        i += 1
+    if pattern.startswith("]", i):
+        i += 1
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "]":
+            return i
+        i += 1
+    return None
+
+
+def _group_end(pattern, start):
+    """Return the index of the `)` closing the group opened at `start`, or None."""
+    depth = 0
+    i = start
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            close = _class_end(pattern, i)
+            if close is None:
+                return None
+            i = close + 1
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return None
+
+
+def _split_alternatives(pattern):
+    """Split a pattern on its top-level `|` operators."""
+    parts = []
+    start = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "(":
+            end = _group_end(pattern, i)
+            if end is None:
+                return [pattern]
+            i = end + 1
+            continue
+        if c == "[":
+            close = _class_end(pattern, i)
+            if close is None:
+                return [pattern]
+            i = close + 1
+            continue
+        if c == "|":
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+def literal_prefixes(pattern):
+    """
+    Return literal strings such that every match of `pattern` starts with one of them.
+
+    Returns None when no literal prefix can be derived (e.g. the pattern starts
+    with a character class or an optional group).
+    """
+    alternatives = _split_alternatives(pattern)
+    if len(alternatives) > 1:
+        prefixes = []
+        for alternative in alternatives:
+            alternative_prefixes = literal_prefixes(alternative)
+            if alternative_prefixes is None:
+                return None
+            prefixes.extend(alternative_prefixes)
+        return prefixes
+
+    literal = ""
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        # Zero-width assertions don't consume text
+        if pattern.startswith("\\b", i):
+            i += 2
+            continue
+        if c == "^":
+            i += 1
+            continue
+        if c == "(":
+            end = _group_end(pattern, i)
+            if end is None:
+                break
+            body = pattern[i + 1:end]
+            optional = end + 1 < len(pattern) and pattern[end + 1] in "?*{"
+            if body.startswith("?:"):
+                body = body[2:]
+            elif body.startswith("?"):
+                break  # Lookarounds, named groups, inline flags
+            group_prefixes = None if optional else literal_prefixes(body)
+            if group_prefixes is None:
+                break
+            return [literal + prefix for prefix in group_prefixes]
+        if c in ".^$*+?{}[]\\|()":
+            # A quantifier can make the preceding character optional
+            if c in "?*{":
+                literal = literal[:-1]
+            break
+        literal += c
+        i += 1
+
+    return [literal] if literal else None
+
+
+# Non-ASCII characters that re.IGNORECASE matches to an ASCII letter but that
+# lower() doesn't turn into it (U+0130 even lowers to "i" plus a combining dot)
+_IGNORECASE_ASCII_FOLD = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
+
+def fold_case(text):
+    """Lowercase text for a substring check against build_literal_prefilter() literals."""
+    if text.isascii():
+        return text.lower()
+    return text.translate(_IGNORECASE_ASCII_FOLD).lower()
+
+
+def build_literal_prefilter(patterns):
+    """
+    Return the lowercased literals one of which appears in any text a pattern matches.
+
+    A plain substring check, against fold_case(text), runs far faster than the
+    regex engine on the (overwhelmingly common) texts that match nothing.
+    Returns None if any pattern has no usable literal prefix, which disables
+    the prefilter.
+    """
+    literals = set()
+    for pattern in patterns.values():
+        prefixes = literal_prefixes(pattern)
+        # Non-ASCII literals can have case variants that lower() doesn't produce
+        if prefixes is None or not all(prefix.isascii() for prefix in prefixes):
+            return None
+        literals.update(prefix.lower() for prefix in prefixes)
+
+    # A literal containing a shorter one ("fucking" vs "fuck") never decides anything
+    return tuple(
+        sorted(
+            literal
+            for literal in literals
+            if not any(other != literal and other in literal for other in literals)
+        )
+    )
+
+
+def build_hyperscan_database(patterns):
+    """
+    Compile all patterns into a single Hyperscan database.
+
+    Pattern ids are indexes into the `patterns` dict. Returns None when
+    hyperscan isn't installed or can't compile one of the patterns (e.g. a
+    lookaround), so callers fall back to the combined regex.
+    """
+    if hyperscan is None or not patterns:
+        return None
+
+    # Input is UTF-8 encoded text. UCP (Unicode \w) isn't used because it
+    # rejects \b, so word boundaries only consider ASCII letters and digits
+    flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8
+    database = hyperscan.Database()
+    try:
+        database.compile(
+            expressions=[pattern.encode("utf-8") for pattern in patterns.values()],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[flags] * len(patterns),
+        )
+    except hyperscan.error:
+        return None
+    return database
+
+
+def _set_match_bit(pattern_id, start, end, flags, mask):
+    """Hyperscan match callback: set the pattern's bit in the context ([mask])"""
+    mask[0] |= 1 << pattern_id
+
+
+def hyperscan_mask(database, text):
+    """
+    Scan `text` with a build_hyperscan_database() database.
+
+    Returns a bitmask where bit i is set if the i-th pattern matched.
+    """
+    mask = [0]
+    database.scan(
+        text.encode("utf-8", errors="replace"),  # Lone surrogates can't be encoded
+        match_event_handler=_set_match_bit,
+        context=mask,
+    )
+    return mask[0]
+
+
+WORKSTATION_ID_FILE = os.path.join(BASE_DATA_DIR, "workstation_id")
+
+
+def get_workstation_id():
+    """Get a stable, friendly workstation identifier"""
+    # Check for environment variable first (allows manual override)
+    if os.environ.get("WORKSTATION_ID"):
+        return os.environ.get("WORKSTATION_ID")
+
+    # Reuse the identifier cached by a previous run (avoids spawning scutil every time)
+    try:
+        with open(WORKSTATION_ID_FILE, "r") as f:
+            cached_id = f.read().strip()
+        if cached_id:
+            return cached_id
+    except OSError:
+        pass
+
+    workstation_id = None
+
+    # On macOS, use LocalHostName (clean, stable, user-friendly)
+    if platform.system() == "Darwin":
+        try:
+            result = subprocess.run(
+                ["scutil", "--get", "LocalHostName"],
+                capture_output=True,
+                text=True,
+                timeout=1
+            )
+            if result.returncode == 0:
+                workstation_id = result.stdout.strip()
+        except:
+            pass
+
+    # Fallback to socket.gethostname() for other platforms
+    if not workstation_id:
+        workstation_id = socket.gethostname()
+
+    # Cache it atomically so concurrent runs never read a partial file
+    try:
+        os.makedirs(BASE_DATA_DIR, exist_ok=True)
+        tmp_file = f"{WORKSTATION_ID_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            f.write(workstation_id)
+        os.replace(tmp_file, WORKSTATION_ID_FILE)
+    except OSError:
+        pass
+
+    return workstation_id
+
+
+WORKSTATION_ID = get_workstation_id()
+
+
+# Keep-alive connections reused across uploads. http.client connections
+# aren't thread-safe, so each thread keeps its own, keyed by (scheme, host:port)
+_thread_local = threading.local()
+
+# Response bodies are only used for the upload log, so only this much is decoded
+RESPONSE_PREVIEW_BYTES = 512
+
+
+def post_json(url, data):
+    """
+    POST `data` as JSON, reusing a keep-alive connection to the same host.
+
+    Connections are opened lazily on first use, so uploading N days costs one
+    TCP/TLS handshake instead of N. Returns (status, response_text), where
+    response_text is at most the first RESPONSE_PREVIEW_BYTES of the body. If
+    the server closed the idle connection, the request is retried once on a new one.
+    """
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    body = json_dumps_bytes(data)
+    key = (parts.scheme, parts.netloc)
+    if not hasattr(_thread_local, "connections"):
+        _thread_local.connections = {}
+    connections = _thread_local.connections
+
+    for attempt in range(2):
+        conn = connections.get(key)
+        if conn is None:
+            if parts.scheme == "https":
+                conn = http.client.HTTPSConnection(parts.netloc, timeout=5)
+            else:
+                conn = http.client.HTTPConnection(parts.netloc, timeout=5)
+            connections[key] = conn
+
+        try:
+            conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            # The whole body must be read before the connection can be reused
+            preview = response.read()[:RESPONSE_PREVIEW_BYTES]
+            return response.status, preview.decode("utf-8", errors="replace")
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            del connections[key]
+            if attempt:
+                raise
+
+
+def upload_concurrently(upload, records, max_workers=8):
+    """
+    Call `upload(record)` (True/False/'STOP') for every record, several at a time.
+
+    Keeping requests in flight hides the per-request round-trip when there's
+    no bulk endpoint. The first record is uploaded on its own so a wrong
+    secret stops everything after a single 'STOP'; if a later upload returns
+    'STOP', records that haven't started yet are skipped (False). Returns one
+    result per record, in order.
+    """
+    if not records:
+        return []
+
+    first_result = upload(records[0])
+    if first_result == "STOP":
+        return [first_result]
+
+    stopped = threading.Event()
+
+    def upload_unless_stopped(record):
+        if stopped.is_set():
+            return False
+        result = upload(record)
+        if result == "STOP":
+            stopped.set()
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return [first_result] + list(executor.map(upload_unless_stopped, records[1:]))
+
+
+def iter_lines(f, start, include_partial):
+    """
+    Yield (line, next_offset) for each line of binary file `f` from byte offset `start`.
+
+    The file is memory-mapped and split with mm.find(), which runs in C,
+    instead of iterating a buffered file object line by line. A trailing line
+    without a newline is only yielded when `include_partial` is true.
+    """
+    size = os.fstat(f.fileno()).st_size
+    if size <= start:
+        return  # Nothing new (and empty files can't be mapped)
+
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+
+        pos = start
+        while pos < size:
+            newline = mm.find(b"\n", pos, size)
+            if newline < 0:
+                if not include_partial:
+                    return  # Line still being written; pick it up next time
+                newline = size
+            yield mm[pos:newline], newline + 1
+            pos = newline + 1
+
+
+def iter_new_lines(filepath, state=None):
+    """
+    Yield the lines of the JSONL file at `filepath` that haven't been read yet.
+
+    Without `state` every line is yielded, including a final one without a
+    newline. With `state` (a dict persisted between runs) the read is
+    incremental: an unchanged file (same inode, size and mtime) isn't opened
+    at all, and a grown file is read from the byte offset where the last read
+    stopped. Only complete lines are consumed, and `state` is updated in
+    place once the caller has taken every line. A replaced or truncated file
+    is read again from the start.
+    """
+    offset = 0
+    if state is not None:
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return
+        if (stat.st_size, stat.st_mtime, stat.st_ino) == (
+            state.get("size"), state.get("mtime"), state.get("inode")
+        ):
+            return
+        offset = state.get("offset", 0)
+        if offset > stat.st_size or state.get("inode", stat.st_ino) != stat.st_ino:
+            # File was truncated or replaced: start over
+            offset = 0
+
+    try:
+        with open(filepath, "rb") as f:
+            for line, next_offset in iter_lines(f, offset, include_partial=state is None):
+                yield line
+                offset = next_offset
+    except OSError:
+        pass
+
+    if state is not None:
+        state.update(size=stat.st_size, mtime=stat.st_mtime, inode=stat.st_ino, offset=offset)
+
+
+def message_key(msg_id):
+    """
+    Compact key for sets of seen/processed message ids.
+
+    Message UUIDs are kept as their 16 raw bytes instead of 36-character
+    strings, which roughly halves the memory of a months-long history (and
+    hashes faster). Only ids already in canonical form (lowercase, hyphenated)
+    are converted, so message_id_from_key() gives back the exact same string;
+    anything else (e.g. request ids) is kept as-is.
+    """
+    try:
+        key = uuid.UUID(msg_id)
+    except (TypeError, ValueError, AttributeError):
+        return msg_id
+    return key.bytes if str(key) == msg_id else msg_id
+
+
+def message_id_from_key(key):
+    """Turn a message_key() back into the message id string"""
+    return str(uuid.UUID(bytes=key)) if isinstance(key, bytes) else key
+
+
+def scan_files_parallel(scan_file, file_list):
+    """
+    Call `scan_file(path)` for every file in `file_list`, one file per task.
+
+    Files are independent and scanning is CPU-bound (JSON parsing + regex), so
+    they're spread over a process pool; `scan_file` must be a module-level
+    function so it can be pickled. Returns one result per file, in the same
+    order as `file_list`.
+    """
+    file_list = [str(filepath) for filepath in file_list]
+    if len(file_list) < 2:
+        return [scan_file(filepath) for filepath in file_list]
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        return list(executor.map(scan_file, file_list, chunksize=4))
+
+
+# Bump when the cached scan results change shape or meaning (e.g. a new
+# field per message, or a fix to the matching code), so old rows are rescanned
+SCAN_CACHE_VERSION = 1
+
+
+def scan_files_cached(scan_file, file_list, cache_file, cache_key):
+    """
+    Like scan_files_parallel(), but remembers each file's result in a SQLite
+    cache at `cache_file`, keyed by path, mtime and size.
+
+    Historical session files never change, so on a rerun only new or grown
+    files are scanned again. `cache_key` should describe whatever the results
+    depend on (e.g. the pattern config and the matching engine); it's combined
+    with SCAN_CACHE_VERSION, and cached entries with a different key are
+    rescanned. Rows for files that no longer exist are dropped. If the
+    cache can't be used, every file is simply scanned.
+    """
+    file_list = [str(filepath) for filepath in file_list]
+    cache_key = f"{SCAN_CACHE_VERSION}:{cache_key}"
+
+    try:
+        conn = sqlite3.connect(cache_file, timeout=10)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS scans ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+            "cache_key TEXT, payload BLOB)"
+        )
+        cached = {
+            path: (mtime_ns, size, key, payload)
+            for path, mtime_ns, size, key, payload in conn.execute(
+                "SELECT path, mtime_ns, size, cache_key, payload FROM scans"
+            )
+        }
+    except (sqlite3.Error, OSError):
+        return scan_files_parallel(scan_file, file_list)
+
+    results = [None] * len(file_list)
+    stats = {}
+    misses = []
+    for i, filepath in enumerate(file_list):
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            misses.append(i)
+            continue
+        stats[filepath] = (stat.st_mtime_ns, stat.st_size)
+        entry = cached.get(filepath)
+        if entry and entry[:3] == (stat.st_mtime_ns, stat.st_size, cache_key):
+            try:
+                results[i] = pickle.loads(entry[3])
+                continue
+            except Exception:
+                pass
+        misses.append(i)
+
+    scanned = scan_files_parallel(scan_file, [file_list[i] for i in misses])
+    for i, result in zip(misses, scanned):
+        results[i] = result
+
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scans VALUES (?, ?, ?, ?, ?)",
+                [
+                    (file_list[i], *stats[file_list[i]], cache_key, pickle.dumps(results[i]))
+                    for i in misses
+                    if file_list[i] in stats
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM scans WHERE path = ?",
+                [(path,) for path in cached if path not in stats],
+            )
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+
+    return results
+
+
+def write_json_atomic(path, data, indent=None):
+    """
+    Write `data` as JSON to `path` through a temporary file and os.replace(),
+    so a crash or a concurrent reader never sees a half-written file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def load_id_log(path):
+    """Read an append-only ID log (one message ID per line) into a list"""
+    with open(path, "r") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def append_id_log(path, ids):
+    """Append message IDs to an ID log; costs O(new IDs), not O(all IDs)"""
+    if ids:
+        with open(path, "a") as f:
+            f.write("".join(f"{msg_id}\n" for msg_id in ids))
+
+
+def write_id_log(path, ids):
+    """Rewrite an ID log with exactly `ids` (atomically, see write_json_atomic())"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("".join(f"{msg_id}\n" for msg_id in ids))
+    os.replace(tmp_path, path)
+
+
+def iter_jsonl_files():
+    """
+    Yield (project_name, filepath) for every JSONL file in every project folder.
+
+    Uses os.scandir so directory checks come from the cached readdir entries
+    instead of a stat() per entry.
+    """
+    with os.scandir(CLAUDE_PROJECTS_BASE) as project_entries:
+        for project_entry in project_entries:
+            if project_entry.name.startswith(".") or not project_entry.is_dir():
+                continue
+            project_name = get_project_display_name(project_entry.name)
+
+            with os.scandir(project_entry.path) as file_entries:
+                for file_entry in file_entries:
+                    if (
+                        file_entry.name.endswith(".jsonl")
+                        and not file_entry.name.startswith(".")
+                        and file_entry.is_file()
+                    ):
+                        yield project_name, file_entry.path
+
+
+def watch_jsonl_files(interval):
+    """
+    Yield lists of (project_name, filepath) for the watchers to scan.
+
+    The first list has every JSONL file. After that, with watchfiles
+    installed, each list holds only the files added or modified since the
+    previous one, and the generator blocks until there is at least one.
+    Otherwise it sleeps `interval` seconds and yields every file again.
+    """
+    yield list(iter_jsonl_files())
+
+    if watchfiles is None:
+        while True:
+            time.sleep(interval)
+            yield list(iter_jsonl_files())
+
+    base = os.path.abspath(CLAUDE_PROJECTS_BASE)
+    for changes in watchfiles.watch(base):
+        changed_files = set()
+        for change, path in changes:
+            if change == watchfiles.Change.deleted or not path.endswith(".jsonl"):
+                continue
+            # Same files as iter_jsonl_files(): <projects>/<project>/<file>.jsonl
+            parts = os.path.relpath(path, base).split(os.sep)
+            if len(parts) != 2 or any(part.startswith(".") for part in parts):
+                continue
+            project_dir_name, filename = parts
+            changed_files.add((
+                get_project_display_name(project_dir_name),
+                os.path.join(CLAUDE_PROJECTS_BASE, project_dir_name, filename),
+            ))
+        if changed_files:
+            yield sorted(changed_files)
+
+
+def get_project_display_name(project_dir_name):
+    name = project_dir_name
+    for prefix in ["-Users-", "-home-", "-var-"]:
+        if name.startswith(prefix):
+            parts = name.split("-", 3)
+            if len(parts) > 3:
+                name = parts[3]
+            break
+    return name
+
+
+def get_utc_today():
+    """Get today's date in UTC (same format as JSONL timestamps)"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
@@ -6,66 +6,17 @@ from word_counter import *
 
 def scan_all_projects():
     """Scan all projects for user messages and word matches"""
-    compiled_tracked = {
-        name: re.compile(pattern, re.IGNORECASE) for name, pattern in TRACKED_WORDS.items()
-    }
-
-    daily_word_counts = {name: defaultdict(int) for name in TRACKED_WORDS}
-    total_word_counts = {name: 0 for name in TRACKED_WORDS}
-    total_user_messages_per_day = defaultdict(int)
-    seen_message_ids = set()  # Track processed message IDs to avoid duplicates
-
     if not os.path.exists(CLAUDE_PROJECTS_BASE):
         print(f"Error: Projects directory not found at {CLAUDE_PROJECTS_BASE}")
         print("Set CLAUDE_PROJECTS env variable to your Claude projects path")
-        return daily_word_counts, total_user_messages_per_day
+        return {name: {} for name in TRACKED_WORDS}, {}
 
     print("Scanning all Claude projects for user messages...")
 
-    for project_dir in Path(CLAUDE_PROJECTS_BASE).iterdir():
-        if project_dir.is_dir() and not project_dir.name.startswith("."):
-            for jsonl_file in project_dir.glob("*.jsonl"):
-                try:
-                    with open(jsonl_file, "r") as f:
-                        for line in f:
-                            try:
-                                entry = json.loads(line)
-                                result = process_user_message_entry(entry, compiled_tracked)
-
-                                if not result:
-                                    continue
-
-                                msg_id = result["msg_id"]
-
-                                # Skip if we've already processed this message
-                                if msg_id in seen_message_ids:
-                                    continue
-
-                                seen_message_ids.add(msg_id)
-                                date_str = result["date_str"]
+    jsonl_files = [jsonl_file for _, jsonl_file in iter_jsonl_files()]
 
-                                # Count total user messages
-                                total_user_messages_per_day[date_str] += 1
-
-                                # Process text blocks for word matches (count once per message)
-                                message_words = set()
-                                for text, matched_words in result["text_blocks"]:
-                                    message_words.update(matched_words.keys())
-
-                                for word_name in message_words:
-                                    daily_word_counts[word_name][date_str] += 1
-                                    total_word_counts[word_name] += 1
-
-                            except:
-                                continue
-                except:
-                    pass
-
-    for name, count in total_word_counts.items():
-        unique_days = len(daily_word_counts[name])
-        print(f"Found {count} '{name}' across {unique_days} days")
-
-    return daily_word_counts, total_user_messages_per_day
+    # Scan files in parallel, then merge in file order so deduplication is unchanged
+    return count_user_messages(scan_all_user_files(jsonl_files))
 
 
 def main():
@@ -157,34 +108,25 @@ def main():
                 print("Upload cancelled.")
                 return
 
+            # Collect every day with data and send them in one request
+            records = build_upload_records(daily_word_counts, total_user_messages_per_day)
+
             print("Uploading to API...")
+            results = upload_to_api_bulk(api_url, secret, records)
             success = 0
             failed = 0
 
-            for date in sorted_dates:
-                # Collect all word counts for this date
-                date_words = {name: counts.get(date, 0) for name, counts in daily_word_counts.items()}
-                total_msgs = total_user_messages_per_day.get(date, 0)
-
-                # Only upload if there are any word matches or messages
-                if any(date_words.values()) or total_msgs > 0:
-                    words_summary = ", ".join([f"{name}={count:2d}" for name, count in date_words.items()])
-                    upload_text = f"  Uploading {date}: {words_summary}, total_user_messages={total_msgs:3d}..."
-                    print(f"{upload_text:<75}", end="")
-
-                    result = upload_to_api(
-                        api_url, secret, date, words_dict=date_words, total_user_messages=total_msgs
-                    )
-                    if result == True:
-                        print("✓")
-                        success += 1
-                    elif result == "STOP":
-                        print("✗")
-                        failed += 1
-                        break
-                    else:
-                        print("✗")
-                        failed += 1
+            for record, result in zip(records, results):
+                words_summary = ", ".join([f"{name}={record[name]:2d}" for name in daily_word_counts])
+                upload_text = f"  {record['day']}: {words_summary}, total_user_messages={record['total_user_messages']:3d}"
+                print(f"{upload_text:<75}", end="")
+
+                if result == True:
+                    print("✓")
+                    success += 1
+                else:
+                    print("✗")
+                    failed += 1
 
             print("-" * 50)
             print(f"Upload complete: {success} successful, {failed} failed")
@@ -1,30 +1,58 @@
 #!/usr/bin/env python3
 """Watcher for user prompt messages - tracks words in user prompts to Claude."""
 import sys
-import time
+import signal
+from collections import Counter
 from word_counter import *
 
 # Additional data files for watcher
 WORD_COUNTS_FILE = os.path.join(DATA_DIR, "word_counts.json")
-PROCESSED_IDS_FILE = os.path.join(DATA_DIR, "processed_ids.json")
+PROCESSED_IDS_FILE = os.path.join(DATA_DIR, "processed_ids.log")
+# Older versions rewrote the whole set as one JSON list on every save
+LEGACY_PROCESSED_IDS_FILE = os.path.join(DATA_DIR, "processed_ids.json")
 TOTAL_MESSAGES_FILE = os.path.join(DATA_DIR, "daily_total_user_messages.json")
+SCAN_STATE_FILE = os.path.join(DATA_DIR, "scan_state.json")
 
 
 def load_processed_ids():
-    """Load set of already processed message IDs"""
-    if os.path.exists(PROCESSED_IDS_FILE):
+    """Load set of already processed message IDs (as message_key() keys)"""
+    try:
+        if os.path.exists(PROCESSED_IDS_FILE):
+            return {message_key(msg_id) for msg_id in load_id_log(PROCESSED_IDS_FILE)}
+        if os.path.exists(LEGACY_PROCESSED_IDS_FILE):
+            with open(LEGACY_PROCESSED_IDS_FILE, "r") as f:
+                return {message_key(msg_id) for msg_id in json.load(f)}
+    except:
+        pass
+    return set()
+
+
+def save_processed_ids(ids_set):
+    """Save all processed message IDs, compacting the log"""
+    write_id_log(PROCESSED_IDS_FILE, [message_id_from_key(key) for key in ids_set])
+    if os.path.exists(LEGACY_PROCESSED_IDS_FILE):
+        os.remove(LEGACY_PROCESSED_IDS_FILE)
+
+
+def append_processed_ids(keys):
+    """Append newly processed message IDs (message_key() keys) to the log"""
+    append_id_log(PROCESSED_IDS_FILE, [message_id_from_key(key) for key in keys])
+
+
+def load_scan_state():
+    """Load per-file scan state (size, mtime, inode, byte offset) from the last run"""
+    if os.path.exists(SCAN_STATE_FILE):
         try:
-            with open(PROCESSED_IDS_FILE, "r") as f:
-                return set(json.load(f))
+            with open(SCAN_STATE_FILE, "r") as f:
+                return json.load(f)
         except:
             pass
-    return set()
+    return {}
 
 
-def save_processed_ids(ids_set):
-    """Save processed message IDs"""
-    with open(PROCESSED_IDS_FILE, "w") as f:
-        json.dump(list(ids_set), f)
+def save_scan_state(state):
+    """Save per-file scan state"""
+    write_json_atomic(SCAN_STATE_FILE, state)
 
 
 def load_word_counts(word_name):
@@ -42,8 +70,7 @@ def load_word_counts(word_name):
 def save_word_counts(word_name, counts):
     """Save daily counts for a specific word"""
     filename = os.path.join(DATA_DIR, f"daily_{word_name}_counts.json")
-    with open(filename, "w") as f:
-        json.dump(counts, f, indent=2)
+    write_json_atomic(filename, counts, indent=2)
 
 
 def load_total_messages_counts():
@@ -59,103 +86,49 @@ def load_total_messages_counts():
 
 def save_total_messages_counts(counts):
     """Save daily counts of total user messages"""
-    with open(TOTAL_MESSAGES_FILE, "w") as f:
-        json.dump(counts, f, indent=2)
+    write_json_atomic(TOTAL_MESSAGES_FILE, counts, indent=2)
 
 
-def backfill_today_total_messages():
-    """Scan all projects and count today's total user messages (deduplicated)"""
-    today_utc = get_utc_today()
-    seen_message_ids = set()
+def backfill_today_words(processed_ids):
+    """
+    Scan all projects once for today's user messages and mark them as processed.
 
-    if not os.path.exists(CLAUDE_PROJECTS_BASE):
-        return 0
-
-    print(f"Backfilling today's ({today_utc}) total user message count...")
-
-    for project_dir in Path(CLAUDE_PROJECTS_BASE).iterdir():
-        if project_dir.is_dir() and not project_dir.name.startswith("."):
-            for jsonl_file in project_dir.glob("*.jsonl"):
-                try:
-                    with open(jsonl_file, "r") as f:
-                        for line in f:
-                            try:
-                                entry = json.loads(line)
-                                if entry.get("type") == "user":
-                                    msg_id = entry.get("uuid") or entry.get("requestId")
-                                    if not msg_id:
-                                        continue
-
-                                    timestamp = entry.get("timestamp", "")
-                                    if timestamp:
-                                        entry_time = datetime.fromisoformat(
-                                            timestamp.replace("Z", "+00:00")
-                                        )
-                                        date_str = entry_time.strftime("%Y-%m-%d")
-                                        if date_str == today_utc and msg_id not in seen_message_ids:
-                                            seen_message_ids.add(msg_id)
-                            except:
-                                continue
-                except:
-                    pass
-
-    return len(seen_message_ids)
-
-
-def backfill_today_words(compiled_tracked, processed_ids):
-    """Scan all projects for today's word matches and mark them as processed"""
+    Returns (total_user_messages, word_matches) for today, each message
+    counted once even if it appears in several files.
+    """
     today_utc = get_utc_today()
     word_matches = {name: 0 for name in TRACKED_WORDS}
     seen_today = set()  # Track messages seen during this backfill to avoid duplicates
 
     if not os.path.exists(CLAUDE_PROJECTS_BASE):
-        return word_matches
-
-    print(f"Backfilling today's ({today_utc}) word matches...")
-
-    for project_dir in Path(CLAUDE_PROJECTS_BASE).iterdir():
-        if project_dir.is_dir() and not project_dir.name.startswith("."):
-            for jsonl_file in project_dir.glob("*.jsonl"):
-                try:
-                    with open(jsonl_file, "r") as f:
-                        for line in f:
-                            try:
-                                entry = json.loads(line)
-                                result = process_user_message_entry(entry, compiled_tracked)
+        return 0, word_matches
 
-                                if not result:
-                                    continue
+    print(f"Backfilling today's ({today_utc}) user messages and word matches...")
 
-                                msg_id = result["msg_id"]
-                                date_str = result["date_str"]
+    # Files from earlier days come straight from the scan cache
+    jsonl_files = [jsonl_file for _, jsonl_file in iter_jsonl_files()]
 
-                                # Only process today's messages
-                                if date_str != today_utc:
-                                    continue
+    for messages in scan_all_user_files(jsonl_files):
+        for msg_id, date_str, message_words, _ in messages:
+            # Only process today's messages
+            if date_str != today_utc:
+                continue
 
-                                # Skip if already counted in this backfill (deduplication)
-                                if msg_id in seen_today:
-                                    continue
+            # Skip if already counted in this backfill (deduplication)
+            key = message_key(msg_id)
+            if key in seen_today:
+                continue
 
-                                seen_today.add(msg_id)
+            seen_today.add(key)
 
-                                # Mark as processed for the main loop
-                                processed_ids.add(msg_id)
+            # Mark as processed for the main loop
+            processed_ids.add(key)
 
-                                # Process text blocks for word matches (count once per message)
-                                message_words = set()
-                                for text, matched_words in result["text_blocks"]:
-                                    message_words.update(matched_words.keys())
+            # Count word matches (once per message)
+            for word_name in message_words:
+                word_matches[word_name] += 1
 
-                                for word_name in message_words:
-                                    word_matches[word_name] += 1
-
-                            except:
-                                continue
-                except:
-                    pass
-
-    return word_matches
+    return len(seen_today), word_matches
 
 
 def main():
@@ -186,25 +159,24 @@ def main():
         print(f"API URL: {api_url}")
     print("-" * 50)
 
-    # Compile patterns
-    compiled_tracked = {
-        name: re.compile(pattern, re.IGNORECASE) for name, pattern in TRACKED_WORDS.items()
-    }
+    # launchd stops the agent with SIGTERM; handle it like Ctrl+C so the
+    # buffered upload log gets flushed on the way out
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
 
     # Initialize
     processed_ids = load_processed_ids()
+    scan_state = load_scan_state()
     word_counts = {name: load_word_counts(name) for name in TRACKED_WORDS}
     total_messages_counts = load_total_messages_counts()
 
-    # Backfill today's total message count on startup
+    # Backfill today's total message count and word matches on startup
+    # (replaces today's counts)
     today_utc = get_utc_today()
-    today_total_actual = backfill_today_total_messages()
+    today_total_actual, backfill_word_matches = backfill_today_words(processed_ids)
     total_messages_counts[today_utc] = today_total_actual
     save_total_messages_counts(total_messages_counts)
     print(f"Found {today_total_actual} total user messages for today")
 
-    # Backfill today's word matches on startup (replaces today's counts)
-    backfill_word_matches = backfill_today_words(compiled_tracked, processed_ids)
     for word_name, count in backfill_word_matches.items():
         if count > 0:
             word_counts[word_name][today_utc] = count  # SET, not ADD
@@ -243,78 +215,63 @@ def main():
         print("Set CLAUDE_PROJECTS environment variable to your Claude projects path")
         return
 
+    # Blocks until session files change (or polls every CHECK_INTERVAL seconds)
+    check_interval = int(os.environ.get("CHECK_INTERVAL", "2"))
+
     try:
-        while True:
+        for jsonl_files in watch_jsonl_files(check_interval):
+            # One wakeup is one burst of writes: stamp its matches once
+            batch_time = datetime.now().strftime("%H:%M:%S")
+            new_processed_ids = []
+            # Hits are collected per wakeup and tallied with Counter (in C)
+            new_dates = []  # One date per new message
+            word_hits = []  # One (word, date) per match
+
+            # Only new lines of changed files are read (see scan_user_jsonl_file)
+            for project_name, jsonl_file in jsonl_files:
+                file_state = scan_state.setdefault(jsonl_file, {})
+                for msg_id, date_str, message_words, first_match_text in scan_user_jsonl_file(
+                    jsonl_file, file_state
+                ):
+                    key = message_key(msg_id)
+                    if key in processed_ids:
+                        continue
+
+                    # Mark as processed
+                    processed_ids.add(key)
+                    new_processed_ids.append(key)
+                    new_dates.append(date_str)
+
+                    # Process word matches (count once per message)
+                    if message_words:
+                        word_hits.extend((word_name, date_str) for word_name in message_words)
+
+                        # Print notification (once per message)
+                        match_types = list(message_words)
+                        print(
+                            f"[{batch_time}] {', '.join(match_types).upper()} in {project_name}: {first_match_text}"
+                        )
+
+            # Fold this wakeup's tallies into the running counts
+            new_total_messages = len(new_dates)
+            for date_str, count in Counter(new_dates).items():
+                total_messages_counts[date_str] = total_messages_counts.get(date_str, 0) + count
+
             new_matches_by_word = {name: 0 for name in TRACKED_WORDS}
-            new_total_messages = 0
-
-            for project_dir in Path(CLAUDE_PROJECTS_BASE).iterdir():
-                if project_dir.is_dir() and not project_dir.name.startswith("."):
-                    project_name = get_project_display_name(project_dir.name)
-
-                    # Scan all JSONL files in this project
-                    for jsonl_file in project_dir.glob("*.jsonl"):
-                        # Single pass: count total messages and check for word matches
-                        try:
-                            with open(jsonl_file, "r") as f:
-                                for line in f:
-                                    try:
-                                        entry = json.loads(line)
-                                        result = process_user_message_entry(entry, compiled_tracked)
-
-                                        if not result:
-                                            continue
-
-                                        msg_id = result["msg_id"]
-                                        date_str = result["date_str"]
-
-                                        if msg_id in processed_ids:
-                                            continue
-
-                                        # Mark as processed
-                                        processed_ids.add(msg_id)
-
-                                        # Update total messages count
-                                        if date_str not in total_messages_counts:
-                                            total_messages_counts[date_str] = 0
-                                        total_messages_counts[date_str] += 1
-                                        new_total_messages += 1
-
-                                        # Process text blocks for word matches (count once per message)
-                                        message_words = set()
-                                        first_match_text = None
-                                        for text, matched_words in result["text_blocks"]:
-                                            if matched_words:
-                                                message_words.update(matched_words.keys())
-                                                if first_match_text is None:
-                                                    first_match_text = text
-
-                                        if message_words:
-                                            for word_name in message_words:
-                                                new_matches_by_word[word_name] += 1
-
-                                                # Update daily counts
-                                                if date_str not in word_counts[word_name]:
-                                                    word_counts[word_name][date_str] = 0
-                                                word_counts[word_name][date_str] += 1
-
-                                            # Print notification (once per message)
-                                            match_types = list(message_words)
-                                            print(
-                                                f"[{datetime.now().strftime('%H:%M:%S')}] {', '.join(match_types).upper()} in {project_name}: {first_match_text.strip()[:100]}"
-                                            )
-
-                                    except:
-                                        continue
-                        except:
-                            pass
+            for (word_name, date_str), count in Counter(word_hits).items():
+                new_matches_by_word[word_name] += count
+                daily_counts = word_counts[word_name]
+                daily_counts[date_str] = daily_counts.get(date_str, 0) + count
 
             if any(new_matches_by_word.values()) or new_total_messages > 0:
-                # Save all state
-                save_processed_ids(processed_ids)
+                # Save state; count files are only rewritten when they changed
+                append_processed_ids(new_processed_ids)
+                save_scan_state(scan_state)
                 for word_name, counts in word_counts.items():
-                    save_word_counts(word_name, counts)
-                save_total_messages_counts(total_messages_counts)
+                    if new_matches_by_word[word_name]:
+                        save_word_counts(word_name, counts)
+                if new_total_messages > 0:
+                    save_total_messages_counts(total_messages_counts)
 
                 updates = [
                     f"{name}: +{count}"
@@ -338,14 +295,14 @@ def main():
                             f"  ✓ Uploaded to API: {words_summary}, total_user_messages={today_total}"
                         )
 
-            time.sleep(int(os.environ.get("CHECK_INTERVAL", "2")))
-
     except KeyboardInterrupt:
         print("\n" + "-" * 50)
         print("Stopping watcher...")
         for name in TRACKED_WORDS:
             total = sum(word_counts[name].values())
             print(f"Final '{name}' count: {total}")
+    finally:
+        close_upload_logger(upload_logger)
 
 
 if __name__ == "__main__":
@@ -1,22 +1,18 @@
 #!/usr/bin/env python3
 """Word counter for user prompt messages - shared utilities."""
 import os
+import sys
 import json
 import re
-import urllib.request
-import socket
-import subprocess
-import platform
-import logging
-from logging.handlers import TimedRotatingFileHandler
-from datetime import datetime, timezone
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
-CLAUDE_PROJECTS_BASE = os.environ.get(
-    "CLAUDE_PROJECTS", os.path.expanduser("~/.claude/projects")
-)
-DATA_DIR = os.path.expanduser("~/.absolutelyright/prompt_words")
+# counter_core lives in the parent scripts/ directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from counter_core import *
+
+DATA_DIR = os.path.join(BASE_DATA_DIR, "prompt_words")
+SCAN_CACHE_FILE = os.path.join(DATA_DIR, "scan_cache.sqlite")
 
 # Get script directory for logging and config
 SCRIPT_DIR = Path(__file__).parent
@@ -24,24 +20,8 @@ LOG_DIR = SCRIPT_DIR.parent.parent / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 UPLOAD_LOG_FILE = LOG_DIR / "prompt_words_uploads.log"
 
-# Set up rotating logger for uploads
-upload_logger = logging.getLogger("prompt_words_uploads")
-upload_logger.setLevel(logging.INFO)
-
-# Only add handler if it hasn't been added yet (prevents duplicates on re-import)
-if not upload_logger.handlers:
-    upload_handler = TimedRotatingFileHandler(
-        UPLOAD_LOG_FILE,
-        when="midnight",
-        interval=1,
-        backupCount=7,  # Keep 7 days of logs
-        encoding="utf-8"
-    )
-    upload_handler.setFormatter(logging.Formatter('%(message)s'))
-    upload_logger.addHandler(upload_handler)
-
-# Prevent propagation to root logger (avoids potential duplicate logging)
-upload_logger.propagate = False
+# Set up rotating, buffered logger for uploads
+upload_logger = get_upload_logger("prompt_words_uploads", UPLOAD_LOG_FILE)
 
 # Load word patterns and server URL from config
 CONFIG_FILE = SCRIPT_DIR / "words_config.json"
@@ -51,53 +31,26 @@ with open(CONFIG_FILE, "r") as f:
 TRACKED_WORDS = CONFIG["tracked_words"]
 SERVER_URL = CONFIG.get("server_url", "http://localhost:3003")
 
+# Compiled once at import, reused by every scan
+TRACKED_NAMES = list(TRACKED_WORDS)
+TRACKED_MATCHER = build_pattern_matcher(TRACKED_WORDS)
 
-def get_workstation_id():
-    """Get a stable, friendly workstation identifier"""
-    # Check for environment variable first (allows manual override)
-    if os.environ.get("WORKSTATION_ID"):
-        return os.environ.get("WORKSTATION_ID")
-
-    # On macOS, use LocalHostName (clean, stable, user-friendly)
-    if platform.system() == "Darwin":
-        try:
-            result = subprocess.run(
-                ["scutil", "--get", "LocalHostName"],
-                capture_output=True,
-                text=True,
-                timeout=1
-            )
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except:
-            pass
-
-    # Fallback to socket.gethostname() for other platforms
-    return socket.gethostname()
-
+# Every user entry contains this token ("type": "user"), so a plain byte
+# search can skip all other lines before they're parsed as JSON
+USER_MARKER = b'"user"'
 
-WORKSTATION_ID = get_workstation_id()
 
+def match_tracked_words(text):
+    """
+    Return {word_name: True} for each tracked word found in `text`, in config order.
 
-def log_upload(api_url, data, status, response_text=None, error=None):
-    """Log upload attempts to file with automatic daily rotation"""
-    try:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = {
-            "timestamp": timestamp,
-            "url": api_url,
-            "data": {k: v for k, v in data.items() if k != "secret"},  # Don't log secret
-            "status": status,
-        }
-        if response_text:
-            log_entry["response"] = response_text
-        if error:
-            log_entry["error"] = str(error)
-
-        upload_logger.info(json.dumps(log_entry))
-    except Exception as e:
-        # Don't fail if logging fails
-        print(f"  Warning: Could not write to log: {e}")
+    Each word is reported exactly when its own regex search() would match,
+    including words that overlap another word's match (see match_pattern_mask()).
+    """
+    mask = match_pattern_mask(TRACKED_MATCHER, text)
+    if not mask:
+        return {}
+    return {name: True for i, name in enumerate(TRACKED_NAMES) if mask >> i & 1}
 
 
 def upload_to_api(api_url, secret, date_str, words_dict=None, total_user_messages=None):
@@ -129,50 +82,91 @@ def upload_to_api(api_url, secret, date_str, words_dict=None, total_user_message
         if secret:
             data["secret"] = secret
 
-        req = urllib.request.Request(
-            f"{api_url}/api/things-i-tell-claude/set",
-            data=json.dumps(data).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-        )
-
-        with urllib.request.urlopen(req, timeout=5) as response:
-            response_text = response.read().decode("utf-8")
-            if response.status == 200:
-                log_upload(api_url, data, "success", response_text)
-                return True
-            elif response.status == 401:
-                log_upload(api_url, data, "unauthorized")
-                print(f"\n🚫 AUTHORIZATION FAILED!")
-                print(f"   Check your secret key and try again.")
-                return "STOP"
-            else:
-                log_upload(api_url, data, f"error_http_{response.status}")
-                print(f"  API error for {date_str}: {response.status}")
-                return False
-    except urllib.error.HTTPError as e:
-        if e.code == 401:
-            log_upload(api_url, data, "unauthorized", error=e)
+        status, response_text = post_json(f"{api_url}/api/things-i-tell-claude/set", data)
+        if status == 200:
+            log_upload(upload_logger, api_url, data, "success", response_text)
+            return True
+        elif status == 401:
+            log_upload(upload_logger, api_url, data, "unauthorized")
             print(f"\n🚫 AUTHORIZATION FAILED!")
             print(f"   Check your secret key and try again.")
             return "STOP"
         else:
-            log_upload(api_url, data, f"error_http_{e.code}", error=e)
-            print(f"  API error for {date_str}: HTTP {e.code}")
+            log_upload(upload_logger, api_url, data, f"error_http_{status}")
+            print(f"  API error for {date_str}: HTTP {status}")
             return False
     except Exception as e:
-        log_upload(api_url, data, "error_exception", error=e)
+        log_upload(upload_logger, api_url, data, "error_exception", error=e)
         print(f"  API error for {date_str}: {e}")
         return False
 
 
-def process_user_message_entry(entry, compiled_tracked):
+def upload_to_api_bulk(api_url, secret, records):
+    """
+    Upload many days in a single request. Returns one True/False/'STOP' per record.
+
+    Args:
+        api_url: API endpoint URL
+        secret: Optional API secret
+        records: List of dicts with "day", "total_user_messages" and word counts
+
+    Falls back to concurrent upload_to_api() calls, one per day, when the
+    server has no bulk endpoint (404/405). The result list stops early if
+    authorization fails.
+    """
+    if not api_url or not records:
+        return []
+
+    data = {
+        "workstation_id": WORKSTATION_ID,
+        "days": records,
+    }
+    if secret:
+        data["secret"] = secret
+
+    try:
+        status, response_text = post_json(f"{api_url}/api/things-i-tell-claude/bulk-set", data)
+    except Exception as e:
+        log_upload(upload_logger, api_url, data, "error_exception", error=e)
+        print(f"  API error for bulk upload: {e}")
+        return [False] * len(records)
+
+    if status == 200:
+        log_upload(upload_logger, api_url, data, "success", response_text)
+        return [True] * len(records)
+    elif status == 401:
+        log_upload(upload_logger, api_url, data, "unauthorized")
+        print(f"\n🚫 AUTHORIZATION FAILED!")
+        print(f"   Check your secret key and try again.")
+        return ["STOP"]
+    elif status in (404, 405):
+        # Older server without the bulk endpoint: upload day by day
+        def upload(record):
+            words_dict = {k: v for k, v in record.items() if k not in ("day", "total_user_messages")}
+            return upload_to_api(
+                api_url, secret, record["day"], words_dict=words_dict,
+                total_user_messages=record.get("total_user_messages")
+            )
+
+        return upload_concurrently(upload, records)
+    else:
+        log_upload(upload_logger, api_url, data, f"error_http_{status}")
+        print(f"  API error for bulk upload: HTTP {status}")
+        return [False] * len(records)
+
+
+def process_user_message_entry(entry):
     """
     Process a single JSONL entry for user messages and extract word matches.
 
+    Matches against the configured TRACKED_WORDS, compiled once at import.
+
     Returns dict with:
         - msg_id: The message UUID
         - date_str: Date in YYYY-MM-DD format
-        - text_blocks: List of (text, matched_words) tuples
+        - matched_words: Dict of every tracked word matched in any text
+          block (word_name -> True)
+        - first_match_text: The first text block that matched, or None
     Returns None if entry should be skipped.
     """
     if entry.get("type") != "user":
@@ -182,16 +176,17 @@ def process_user_message_entry(entry, compiled_tracked):
     if not msg_id:
         return None
 
-    # Parse timestamp
+    # ISO 8601 timestamps start with YYYY-MM-DD, so slice instead of parsing.
+    # Interned so every message of a day shares one string: dict lookups on it
+    # hit the identity fast path, and pickled results store it once
     timestamp = entry.get("timestamp", "")
-    if timestamp:
-        entry_time = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-        date_str = entry_time.strftime("%Y-%m-%d")
+    if len(timestamp) >= 10:
+        date_str = sys.intern(timestamp[:10])
     else:
         date_str = get_utc_today()
 
-    # Extract text blocks and check for word matches
-    text_blocks = []
+    # Extract text blocks
+    texts = []
     message = entry.get("message", {})
     content = message.get("content")
 
@@ -199,47 +194,147 @@ def process_user_message_entry(entry, compiled_tracked):
         # Handle both string format and array format
         if isinstance(content, str):
             # Direct string content
-            matched_words = {}
-            for word_name, word_regex in compiled_tracked.items():
-                if word_regex.search(content):
-                    matched_words[word_name] = True
-            text_blocks.append((content, matched_words))
+            texts.append(content)
         elif isinstance(content, list):
             # Array of content items
             for content_item in content:
                 if isinstance(content_item, dict) and content_item.get("type") == "text":
-                    text = content_item.get("text", "")
-
-                    # Check for tracked word matches
-                    matched_words = {}
-                    for word_name, word_regex in compiled_tracked.items():
-                        if word_regex.search(text):
-                            matched_words[word_name] = True
-
-                    text_blocks.append((text, matched_words))
+                    texts.append(content_item.get("text", ""))
+
+    # Check for tracked word matches; only the union is kept
+    matched_words = {}
+    first_match_text = None
+    for text in texts:
+        block_words = match_tracked_words(text)
+        if block_words:
+            matched_words.update(block_words)
+            if first_match_text is None:
+                first_match_text = text
 
     return {
         "msg_id": msg_id,
         "date_str": date_str,
-        "text_blocks": text_blocks,
+        "matched_words": matched_words,
+        "first_match_text": first_match_text,
     }
 
 
-def get_project_display_name(project_dir_name):
-    """Extract readable project name from directory name"""
-    name = project_dir_name
-    for prefix in ["-Users-", "-home-", "-var-"]:
-        if name.startswith(prefix):
-            parts = name.split("-", 3)
-            if len(parts) > 3:
-                name = parts[3]
-            break
-    return name
+# One scanned user message, with each tracked word counted once per message
+ScannedUserMessage = namedtuple(
+    "ScannedUserMessage", ["msg_id", "date_str", "words", "first_match_text"]
+)
+
+
+def scan_user_message_entry(entry):
+    """
+    Turn one parsed JSONL entry into a ScannedUserMessage, with each tracked
+    word counted once per message. first_match_text is the first matching
+    text block, stripped and cut to 100 characters (None when nothing
+    matched). Returns None if the entry isn't a user message.
+    """
+    result = process_user_message_entry(entry)
+    if not result:
+        return None
+
+    first_match_text = result["first_match_text"]
+    if first_match_text is not None:
+        first_match_text = first_match_text.strip()[:100]
+
+    return ScannedUserMessage(
+        result["msg_id"], result["date_str"], tuple(result["matched_words"]), first_match_text
+    )
+
+
+def scan_user_jsonl_file(filepath, state=None):
+    """
+    Scan one JSONL file for user messages and their tracked-word matches.
+
+    Returns a list of ScannedUserMessage records. Runs inside worker
+    processes (see scan_files_parallel()), so it only returns plain,
+    picklable values.
+
+    If `state` (a dict persisted between runs) is given, only lines appended
+    since the last scan are read (see iter_new_lines()).
+    """
+    messages = []
+
+    for line in iter_new_lines(filepath, state):
+        if USER_MARKER not in line:
+            continue
+        try:
+            message = scan_user_message_entry(json_loads(line))
+            if message:
+                messages.append(message)
+        except:
+            continue
+
+    return messages
+
+
+def scan_all_user_files(file_list):
+    """
+    Scan JSONL files in parallel; returns one message list per file, in order.
+
+    Results are cached in SCAN_CACHE_FILE, so unchanged files aren't read
+    again on the next run (the cache is invalidated when TRACKED_WORDS or the
+    matching engine change).
+    """
+    ensure_data_dir()
+    cache_key = json.dumps([TRACKED_WORDS, matcher_engine(TRACKED_MATCHER)], sort_keys=True)
+    return scan_files_cached(scan_user_jsonl_file, file_list, SCAN_CACHE_FILE, cache_key)
 
 
-def get_utc_today():
-    """Get today's date in UTC (same format as JSONL timestamps)"""
-    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+def count_user_messages(file_messages):
+    """
+    Merge scanned user messages into daily counts, skipping duplicate message IDs.
+
+    `file_messages` holds one ScannedUserMessage list per file; files are
+    merged in that order so deduplication doesn't depend on scan order.
+
+    Returns (daily_word_counts, total_user_messages_per_day):
+        - daily_word_counts: word_name -> {date: count}
+        - total_user_messages_per_day: date -> user message count
+    """
+    daily_word_counts = {name: defaultdict(int) for name in TRACKED_WORDS}
+    total_word_counts = {name: 0 for name in TRACKED_WORDS}
+    total_user_messages_per_day = defaultdict(int)
+    seen_message_ids = set()  # Track processed message IDs to avoid duplicates
+
+    for messages in file_messages:
+        for msg_id, date_str, message_words, _ in messages:
+            # Skip if we've already processed this message
+            key = message_key(msg_id)
+            if key in seen_message_ids:
+                continue
+
+            seen_message_ids.add(key)
+
+            # Count total user messages
+            total_user_messages_per_day[date_str] += 1
+
+            # Count word matches (once per message, not per text block)
+            for word_name in message_words:
+                daily_word_counts[word_name][date_str] += 1
+                total_word_counts[word_name] += 1
+
+    for name, count in total_word_counts.items():
+        unique_days = len(daily_word_counts[name])
+        print(f"Found {count} '{name}' across {unique_days} days")
+
+    return daily_word_counts, total_user_messages_per_day
+
+
+def build_upload_records(daily_word_counts, total_user_messages_per_day):
+    """Build upload_to_api_bulk() records for every day with word matches or messages"""
+    records = []
+    for date in sorted(total_user_messages_per_day):
+        date_words = {name: counts.get(date, 0) for name, counts in daily_word_counts.items()}
+        total_msgs = total_user_messages_per_day[date]
+
+        # Only upload if there are any word matches or messages
+        if any(date_words.values()) or total_msgs > 0:
+            records.append({"day": date, **date_words, "total_user_messages": total_msgs})
+    return records
 
 
 def ensure_data_dir():
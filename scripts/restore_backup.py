@@ -11,12 +11,27 @@ sys.path.append(str(Path(__file__).parent.parent))
 from src.database import init_db, get_session
 from src.models import DayCount
 
+# orjson is optional; it parses the backup and serializes each day's
+# patterns several times faster than the stdlib
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+PATTERN_KEYS = ("absolutely", "right", "perfect", "excellent")
+
 
 async def restore_from_backup(backup_file: str):
     """Restore database from backup JSON."""
     # Read backup file
-    with open(backup_file, 'r') as f:
-        backup_data = json.load(f)
+    with open(backup_file, 'rb') as f:
+        backup_data = json_loads(f.read())
 
     print(f"Loading backup from {backup_file}")
     print(f"Found {len(backup_data)} workstations")
@@ -28,13 +43,13 @@ async def restore_from_backup(backup_file: str):
     from src.database import async_session_maker
     async with async_session_maker() as session:
         # Clear existing data (optional - comment out to append)
-        from sqlalchemy import delete
+        from sqlalchemy import delete, insert
         await session.execute(delete(DayCount))
         await session.commit()
         print("Cleared existing data")
 
         # Import data
-        total_records = 0
+        rows = []
         for ws_data in backup_data:
             workstation_id = ws_data['workstation_id']
             history = ws_data['history']
@@ -46,24 +61,20 @@ async def restore_from_backup(backup_file: str):
                 total_messages = day_data.get('total_messages', 0)
 
                 # Extract patterns
-                patterns = {}
-                for key in ['absolutely', 'right', 'perfect', 'excellent']:
-                    if key in day_data:
-                        patterns[key] = day_data[key]
-
-                # Create record
-                record = DayCount(
-                    day=day,
-                    workstation_id=workstation_id,
-                    patterns=json.dumps(patterns),
-                    total_messages=total_messages
-                )
-                session.add(record)
-                total_records += 1
-
-        # Commit all records
+                patterns = {key: day_data[key] for key in PATTERN_KEYS if key in day_data}
+
+                rows.append({
+                    "day": day,
+                    "workstation_id": workstation_id,
+                    "patterns": json_dumps(patterns),
+                    "total_messages": total_messages,
+                })
+
+        # Insert all records in one executemany and commit once
+        if rows:
+            await session.execute(insert(DayCount), rows)
         await session.commit()
-        print(f"\n✓ Imported {total_records} total records")
+        print(f"\n✓ Imported {len(rows)} total records")
 
     print("\nRestore complete!")
 
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Unified backfill for both tracker types (absolutely right + prompt words).
+
+backfill.py and prompt_words/backfill.py each read and JSON-parse every
+JSONL file. This script reads each file once and feeds assistant entries to
+the pattern scanner and user entries to the prompt words scanner.
+"""
+import os
+import sys
+
+# word_counter lives in prompt_words/; both trackers share counter_core
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_words"))
+
+import claude_counter
+import word_counter
+from counter_core import *
+
+UNIFIED_SCAN_CACHE_FILE = os.path.join(BASE_DATA_DIR, "unified_scan_cache.sqlite")
+
+
+def scan_file_both(filepath):
+    """
+    Scan one JSONL file for both trackers in a single pass.
+
+    Returns (assistant_messages, user_messages): a ScannedMessage list and a
+    ScannedUserMessage list. Runs inside worker processes.
+    """
+    assistant_messages = []
+    user_messages = []
+
+    try:
+        with open(filepath, "rb") as f:
+            for line, _ in iter_lines(f, 0, include_partial=True):
+                if claude_counter.ASSISTANT_MARKER not in line and word_counter.USER_MARKER not in line:
+                    continue
+                try:
+                    entry = json_loads(line)
+                    entry_type = entry.get("type")
+                    if entry_type == "assistant":
+                        message = claude_counter.scan_message_entry(entry)
+                        if message:
+                            assistant_messages.append(message)
+                    elif entry_type == "user":
+                        message = word_counter.scan_user_message_entry(entry)
+                        if message:
+                            user_messages.append(message)
+                except:
+                    continue
+    except:
+        pass
+
+    return assistant_messages, user_messages
+
+
+def scan_all_projects():
+    """
+    Scan all projects once for both trackers.
+
+    Returns ((daily_counts, project_breakdown, total_messages_per_day),
+    (daily_word_counts, total_user_messages_per_day)), as returned by
+    claude_counter.count_messages() and word_counter.count_user_messages().
+    """
+    print("Scanning all Claude projects...")
+
+    jsonl_files = list(iter_jsonl_files())
+
+    # Cached results depend on both configs and the engines that match them
+    os.makedirs(BASE_DATA_DIR, exist_ok=True)
+    cache_key = json.dumps(
+        [
+            claude_counter.PATTERNS,
+            word_counter.TRACKED_WORDS,
+            matcher_engine(claude_counter.PATTERN_MATCHER),
+            matcher_engine(word_counter.TRACKED_MATCHER),
+        ],
+        sort_keys=True,
+    )
+    scanned = scan_files_cached(
+        scan_file_both,
+        [jsonl_file for _, jsonl_file in jsonl_files],
+        UNIFIED_SCAN_CACHE_FILE,
+        cache_key,
+    )
+
+    print("\nAbsolutely right patterns:")
+    pattern_results = claude_counter.count_messages(
+        [project_name for project_name, _ in jsonl_files],
+        [assistant_messages for assistant_messages, _ in scanned],
+    )
+    print("\nPrompt words:")
+    word_results = word_counter.count_user_messages(
+        [user_messages for _, user_messages in scanned]
+    )
+
+    return pattern_results, word_results
+
+
+def print_upload_results(label, records, results, total_key):
+    """
+    Print the per-day upload outcome and return (success, failed).
+
+    A 'STOP' result means the server rejected the secret. It's reported
+    once instead of being counted as a failed day, and days that were never
+    uploaded because of it aren't listed.
+    """
+    success = 0
+    failed = 0
+
+    print(f"\n{label}:")
+    for record, result in zip(records, results):
+        if result == "STOP":
+            continue
+
+        counts_summary = ", ".join(
+            f"{name}={count:2d}" for name, count in record.items() if name not in ("day", total_key)
+        )
+        upload_text = f"  {record['day']}: {counts_summary}, {total_key}={record[total_key]:3d}"
+        print(f"{upload_text:<75}", end="")
+
+        if result == True:
+            print("✓")
+            success += 1
+        else:
+            print("✗")
+            failed += 1
+
+    if "STOP" in results:
+        print("  🚫 Stopped: authorization failed")
+
+    return success, failed
+
+
+def main():
+    """Main unified backfill process"""
+    print("Unified Backfill (absolutely right + prompt words)")
+    print("=" * 50)
+
+    # Each tracker uploads to its configured server unless overridden
+    upload = "--upload" in sys.argv
+    api_url = None
+    secret = None
+
+    for i, arg in enumerate(sys.argv):
+        if arg == "--upload":
+            # Check if next arg is a URL (doesn't start with --)
+            if i + 1 < len(sys.argv) and not sys.argv[i + 1].startswith("--"):
+                api_url = sys.argv[i + 1]
+                # Check if there's a secret after the URL
+                if i + 2 < len(sys.argv) and not sys.argv[i + 2].startswith("--"):
+                    secret = sys.argv[i + 2]
+        elif arg == "--secret" and i + 1 < len(sys.argv):
+            secret = sys.argv[i + 1]
+
+    patterns_url = (api_url or claude_counter.SERVER_URL) if upload else None
+    words_url = (api_url or word_counter.SERVER_URL) if upload else None
+
+    print(f"Projects directory: {CLAUDE_PROJECTS_BASE}")
+    if upload:
+        print(f"Will upload patterns to: {patterns_url}")
+        print(f"Will upload prompt words to: {words_url}")
+    print("-" * 50)
+
+    if not os.path.exists(CLAUDE_PROJECTS_BASE):
+        print(f"Error: Projects directory not found at {CLAUDE_PROJECTS_BASE}")
+        print("Set CLAUDE_PROJECTS env variable to your Claude projects path")
+        return
+
+    pattern_results, word_results = scan_all_projects()
+    daily_counts, project_breakdown, total_messages_per_day = pattern_results
+    daily_word_counts, total_user_messages_per_day = word_results
+
+    if "--json" in sys.argv:
+        # JSON output for piping to other tools, one section per tracker
+        patterns_output = {pattern: dict(counts) for pattern, counts in daily_counts.items()}
+        patterns_output["by_date"] = {
+            date: dict(project_breakdown[date])
+            for date in sorted(project_breakdown)
+        }
+        words_output = {word: dict(counts) for word, counts in daily_word_counts.items()}
+        words_output["total_user_messages"] = dict(total_user_messages_per_day)
+        print(json.dumps({"patterns": patterns_output, "prompt_words": words_output}, indent=2))
+        return
+
+    pattern_records = claude_counter.build_upload_records(daily_counts, total_messages_per_day)
+    word_records = word_counter.build_upload_records(daily_word_counts, total_user_messages_per_day)
+
+    print("-" * 50)
+    print(f"Days with pattern matches: {len(pattern_records)}")
+    print(f"Days with prompt data: {len(word_records)}")
+
+    if not upload or not (pattern_records or word_records):
+        return
+
+    print("\n" + "-" * 50)
+    confirm = input("Continue with upload? (y/N): ").strip().lower()
+    if confirm not in ["y", "yes"]:
+        print("Upload cancelled.")
+        return
+
+    print("Uploading to API...")
+    results = claude_counter.upload_to_api_bulk(patterns_url, secret, pattern_records)
+    success, failed = print_upload_results("Patterns", pattern_records, results, "total_messages")
+
+    if "STOP" not in results:
+        results = word_counter.upload_to_api_bulk(words_url, secret, word_records)
+        ok, bad = print_upload_results("Prompt words", word_records, results, "total_user_messages")
+        success += ok
+        failed += bad
+
+    print("-" * 50)
+    if "STOP" in results:
+        print(f"Upload stopped: authorization failed ({success} successful, {failed} failed)")
+    else:
+        print(f"Upload complete: {success} successful, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,49 @@
 #!/usr/bin/env python3
 """
 Unified watcher for both tracker types (absolutely right + prompt words).
-Runs both watchers concurrently in separate threads.
+Runs both watchers concurrently, each in its own Python process.
 """
 import sys
 import os
-import threading
+import signal
+import subprocess
 import time
 
-def run_absolutely_right_watcher():
-    """Run the absolutely right watcher in this thread"""
-    try:
-        # Add scripts directory to path temporarily for this watcher's imports
-        scripts_dir = os.path.dirname(os.path.abspath(__file__))
-        sys.path.insert(0, scripts_dir)
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
 
-        import watcher
-        print("[ABSOLUTELY RIGHT WATCHER] Starting...")
-        watcher.main()
-    except KeyboardInterrupt:
-        print("[ABSOLUTELY RIGHT WATCHER] Stopped by user")
-    except Exception as e:
-        print(f"[ABSOLUTELY RIGHT WATCHER] Error: {e}")
-    finally:
-        # Clean up path
-        if scripts_dir in sys.path:
-            sys.path.remove(scripts_dir)
+WATCHERS = [
+    ("ABSOLUTELY RIGHT WATCHER", os.path.join(SCRIPTS_DIR, "watcher.py")),
+    ("PROMPT WORDS WATCHER", os.path.join(SCRIPTS_DIR, "prompt_words", "watcher.py")),
+]
 
 
-def run_prompt_words_watcher():
-    """Run the prompt words watcher in this thread"""
-    try:
-        # Load prompt words watcher as a unique module to avoid conflicts
-        scripts_dir = os.path.dirname(os.path.abspath(__file__))
-        prompt_words_dir = os.path.join(scripts_dir, "prompt_words")
-        prompt_watcher_path = os.path.join(prompt_words_dir, "watcher.py")
+def start_watcher(label, script_path):
+    """Start one watcher script in a child process, passing our arguments through"""
+    print(f"[{label}] Starting...")
+    # Each watcher runs from its own directory, like when started by hand. A
+    # new session keeps terminal Ctrl+C from reaching it twice: the signal is
+    # forwarded once by stop_watchers()
+    return subprocess.Popen(
+        [sys.executable, script_path, *sys.argv[1:]],
+        cwd=os.path.dirname(script_path),
+        start_new_session=True,
+    )
 
-        # Change to prompt_words directory for any relative paths they might use
-        original_cwd = os.getcwd()
-        os.chdir(prompt_words_dir)
 
-        spec = importlib.util.spec_from_file_location("promptwords_watcher", prompt_watcher_path)
-        prompt_watcher = importlib.util.module_from_spec(spec)
-        sys.modules["promptwords_watcher"] = prompt_watcher
-        spec.loader.exec_module(prompt_watcher)
+def stop_watchers(processes, timeout=10):
+    """Ask every running watcher to stop (SIGINT, like Ctrl+C), then wait for it"""
+    for _, process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGINT)
 
-        print("[PROMPT WORDS WATCHER] Starting...")
-        prompt_watcher.main()
-    except KeyboardInterrupt:
-        print("[PROMPT WORDS WATCHER] Stopped by user")
-    except Exception as e:
-        print(f"[PROMPT WORDS WATCHER] Error: {e}")
-    finally:
-        os.chdir(original_cwd)
+    deadline = time.monotonic() + timeout
+    for label, process in processes:
+        try:
+            process.wait(timeout=max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            print(f"[{label}] Did not stop in time, killing it")
+            process.kill()
+            process.wait()
 
 
 def main():
@@ -60,32 +51,15 @@ def main():
     print("=" * 60)
     print("UNIFIED WATCHER - Running both trackers concurrently")
     print("=" * 60)
-
-    # Pass through command-line arguments to child watchers
-    # (e.g., --secret for authentication)
-    sys.argv[0] = "unified_watcher"  # Keep original command name for child processes
-
     print()
 
-    # Create daemon threads for both watchers
-    absolutely_thread = threading.Thread(
-        target=run_absolutely_right_watcher,
-        name="AbsolutelyRightWatcher",
-        daemon=True
-    )
-
-    prompt_words_thread = threading.Thread(
-        target=run_prompt_words_watcher,
-        name="PromptWordsWatcher",
-        daemon=True
-    )
+    # launchd stops the agent with SIGTERM; handle it like Ctrl+C so the
+    # watchers get a chance to flush their state and logs
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
 
-    # Start both threads
-    absolutely_thread.start()
-    # time.sleep(0.5)  # Slight delay so output doesn't mix
-    # TEMPORARILY DISABLED: prompt_words_thread causing duplicate uploads due to module import conflicts
-    # TODO: Fix by running in separate processes instead of threads
-    # prompt_words_thread.start()
+    # Separate processes: the watchers share module names (and module-level
+    # state), and don't compete for one GIL while matching
+    processes = [(label, start_watcher(label, script_path)) for label, script_path in WATCHERS]
 
     print()
     print("Both watchers are now running. Press Ctrl+C to stop all.")
@@ -93,13 +67,20 @@ def main():
     print()
 
     try:
-        # Keep the main thread alive while daemon threads run
-        while True:
-            time.sleep(10)
+        # Keep running until every watcher has exited on its own
+        running = list(processes)
+        while running:
+            time.sleep(1)
+            for label, process in list(running):
+                returncode = process.poll()
+                if returncode is not None:
+                    print(f"[{label}] Exited with code {returncode}")
+                    running.remove((label, process))
     except KeyboardInterrupt:
         print()
         print("-" * 60)
         print("Stopping all watchers...")
+        stop_watchers(processes)
         print("All watchers stopped.")
 
 
@@ -1,28 +1,56 @@
 #!/usr/bin/env python3
 import sys
-import time
+import signal
+from collections import Counter
 from claude_counter import *
 
 # Additional data files for watcher
 PROJECT_COUNTS_FILE = os.path.join(DATA_DIR, "project_counts.json")
-PROCESSED_IDS_FILE = os.path.join(DATA_DIR, "processed_ids.json")
+PROCESSED_IDS_FILE = os.path.join(DATA_DIR, "processed_ids.log")
+# Older versions rewrote the whole set as one JSON list on every save
+LEGACY_PROCESSED_IDS_FILE = os.path.join(DATA_DIR, "processed_ids.json")
+SCAN_STATE_FILE = os.path.join(DATA_DIR, "scan_state.json")
 
 
 def load_processed_ids():
-    """Load set of already processed message IDs"""
-    if os.path.exists(PROCESSED_IDS_FILE):
+    """Load set of already processed message IDs (as message_key() keys)"""
+    try:
+        if os.path.exists(PROCESSED_IDS_FILE):
+            return {message_key(msg_id) for msg_id in load_id_log(PROCESSED_IDS_FILE)}
+        if os.path.exists(LEGACY_PROCESSED_IDS_FILE):
+            with open(LEGACY_PROCESSED_IDS_FILE, "r") as f:
+                return {message_key(msg_id) for msg_id in json.load(f)}
+    except:
+        pass
+    return set()
+
+
+def save_processed_ids(ids_set):
+    """Save all processed message IDs, compacting the log"""
+    write_id_log(PROCESSED_IDS_FILE, [message_id_from_key(key) for key in ids_set])
+    if os.path.exists(LEGACY_PROCESSED_IDS_FILE):
+        os.remove(LEGACY_PROCESSED_IDS_FILE)
+
+
+def append_processed_ids(keys):
+    """Append newly processed message IDs (message_key() keys) to the log"""
+    append_id_log(PROCESSED_IDS_FILE, [message_id_from_key(key) for key in keys])
+
+
+def load_scan_state():
+    """Load per-file scan state (size, mtime, inode, byte offset) from the last run"""
+    if os.path.exists(SCAN_STATE_FILE):
         try:
-            with open(PROCESSED_IDS_FILE, "r") as f:
-                return set(json.load(f))
+            with open(SCAN_STATE_FILE, "r") as f:
+                return json.load(f)
         except:
             pass
-    return set()
+    return {}
 
 
-def save_processed_ids(ids_set):
-    """Save processed message IDs"""
-    with open(PROCESSED_IDS_FILE, "w") as f:
-        json.dump(list(ids_set), f)
+def save_scan_state(state):
+    """Save per-file scan state"""
+    write_json_atomic(SCAN_STATE_FILE, state)
 
 
 def load_project_counts():
@@ -38,8 +66,7 @@ def load_project_counts():
 
 def save_project_counts(counts):
     """Save per-project counts"""
-    with open(PROJECT_COUNTS_FILE, "w") as f:
-        json.dump(counts, f, indent=2)
+    write_json_atomic(PROJECT_COUNTS_FILE, counts, indent=2)
 
 
 def load_pattern_counts(pattern_name):
@@ -57,8 +84,7 @@ def load_pattern_counts(pattern_name):
 def save_pattern_counts(pattern_name, counts):
     """Save daily counts for a specific pattern"""
     filename = os.path.join(DATA_DIR, f"daily_{pattern_name}_counts.json")
-    with open(filename, "w") as f:
-        json.dump(counts, f, indent=2)
+    write_json_atomic(filename, counts, indent=2)
 
 
 def load_total_messages_counts():
@@ -76,8 +102,7 @@ def load_total_messages_counts():
 def save_total_messages_counts(counts):
     """Save daily counts of total assistant messages"""
     filename = os.path.join(DATA_DIR, "daily_total_messages.json")
-    with open(filename, "w") as f:
-        json.dump(counts, f, indent=2)
+    write_json_atomic(filename, counts, indent=2)
 
 
 def backfill_today_total_messages():
@@ -90,36 +115,32 @@ def backfill_today_total_messages():
 
     print(f"Backfilling today's ({today_utc}) total message count...")
 
-    for project_dir in Path(CLAUDE_PROJECTS_BASE).iterdir():
-        if project_dir.is_dir() and not project_dir.name.startswith("."):
-            for jsonl_file in project_dir.glob("*.jsonl"):
-                try:
-                    with open(jsonl_file, "r") as f:
-                        for line in f:
-                            try:
-                                entry = json.loads(line)
-                                if entry.get("type") == "assistant":
-                                    msg_id = entry.get("uuid") or entry.get("requestId")
-                                    if not msg_id:
-                                        continue
-
-                                    timestamp = entry.get("timestamp", "")
-                                    if timestamp:
-                                        entry_time = datetime.fromisoformat(
-                                            timestamp.replace("Z", "+00:00")
-                                        )
-                                        date_str = entry_time.strftime("%Y-%m-%d")
-                                        if date_str == today_utc and msg_id not in seen_message_ids:
-                                            seen_message_ids.add(msg_id)
-                            except:
+    for _, jsonl_file in iter_jsonl_files():
+        try:
+            with open(jsonl_file, "rb") as f:
+                for line, _ in iter_lines(f, 0, include_partial=True):
+                    if ASSISTANT_MARKER not in line:
+                        continue
+                    try:
+                        entry = json_loads(line)
+                        if entry.get("type") == "assistant":
+                            msg_id = entry.get("uuid") or entry.get("requestId")
+                            if not msg_id:
                                 continue
-                except:
-                    pass
+
+                            # ISO 8601 timestamps start with YYYY-MM-DD
+                            date_str = entry.get("timestamp", "")[:10]
+                            if date_str == today_utc:
+                                seen_message_ids.add(message_key(msg_id))
+                    except:
+                        continue
+        except:
+            pass
 
     return len(seen_message_ids)
 
 
-def backfill_today_patterns(compiled_patterns, processed_ids, project_counts):
+def backfill_today_patterns(processed_ids, project_counts):
     """Scan all projects for today's pattern matches and mark them as processed"""
     today_utc = get_utc_today()
     pattern_matches = {name: 0 for name in PATTERNS}
@@ -130,55 +151,34 @@ def backfill_today_patterns(compiled_patterns, processed_ids, project_counts):
 
     print(f"Backfilling today's ({today_utc}) pattern matches...")
 
-    for project_dir in Path(CLAUDE_PROJECTS_BASE).iterdir():
-        if project_dir.is_dir() and not project_dir.name.startswith("."):
-            project_name = get_project_display_name(project_dir.name)
-
-            for jsonl_file in project_dir.glob("*.jsonl"):
-                try:
-                    with open(jsonl_file, "r") as f:
-                        for line in f:
-                            try:
-                                entry = json.loads(line)
-                                result = process_message_entry(entry, compiled_patterns)
-
-                                if not result:
-                                    continue
-
-                                msg_id = result["msg_id"]
-                                date_str = result["date_str"]
+    # Files from earlier days come straight from the scan cache
+    jsonl_files = list(iter_jsonl_files())
+    file_messages = scan_all_files([jsonl_file for _, jsonl_file in jsonl_files])
 
-                                # Only process today's messages
-                                if date_str != today_utc:
-                                    continue
+    for (project_name, _), messages in zip(jsonl_files, file_messages):
+        for msg_id, date_str, message_patterns, _ in messages:
+            # Only process today's messages
+            if date_str != today_utc:
+                continue
 
-                                # Skip if already counted in this backfill (deduplication)
-                                if msg_id in seen_today:
-                                    continue
+            # Skip if already counted in this backfill (deduplication)
+            if msg_id in seen_today:
+                continue
 
-                                seen_today.add(msg_id)
+            seen_today.add(msg_id)
 
-                                # Mark as processed for the main loop
-                                processed_ids.add(msg_id)
+            # Mark as processed for the main loop
+            processed_ids.add(message_key(msg_id))
 
-                                # Process text blocks for pattern matches (count once per message)
-                                message_patterns = set()
-                                for text, matched_patterns in result["text_blocks"]:
-                                    message_patterns.update(matched_patterns.keys())
+            # Count pattern matches (once per message)
+            for pattern_name in message_patterns:
+                pattern_matches[pattern_name] += 1
 
-                                for pattern_name in message_patterns:
-                                    pattern_matches[pattern_name] += 1
-
-                                    # Update project counts (only for "absolutely")
-                                    if pattern_name == "absolutely":
-                                        if project_name not in project_counts:
-                                            project_counts[project_name] = 0
-                                        project_counts[project_name] += 1
-
-                            except:
-                                continue
-                except:
-                    pass
+                # Update project counts (only for "absolutely")
+                if pattern_name == "absolutely":
+                    if project_name not in project_counts:
+                        project_counts[project_name] = 0
+                    project_counts[project_name] += 1
 
     return pattern_matches
 
@@ -211,13 +211,13 @@ def main():
         print(f"API URL: {api_url}")
     print("-" * 50)
 
-    # Compile patterns
-    compiled_patterns = {
-        name: re.compile(pattern, re.IGNORECASE) for name, pattern in PATTERNS.items()
-    }
+    # launchd stops the agent with SIGTERM; handle it like Ctrl+C so the
+    # buffered upload log gets flushed on the way out
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
 
     # Initialize
     processed_ids = load_processed_ids()
+    scan_state = load_scan_state()
     project_counts = load_project_counts()
     pattern_counts = {name: load_pattern_counts(name) for name in PATTERNS}
     total_messages_counts = load_total_messages_counts()
@@ -232,7 +232,7 @@ def main():
     # Backfill today's pattern matches on startup (replaces today's counts)
     # Reset project_counts since we're doing a full recount
     project_counts = {}
-    backfill_pattern_matches = backfill_today_patterns(compiled_patterns, processed_ids, project_counts)
+    backfill_pattern_matches = backfill_today_patterns(processed_ids, project_counts)
     for pattern_name, count in backfill_pattern_matches.items():
         if count > 0:
             pattern_counts[pattern_name][today_utc] = count  # SET, not ADD
@@ -272,85 +272,72 @@ def main():
         print("Set CLAUDE_PROJECTS environment variable to your Claude projects path")
         return
 
+    # Blocks until session files change (or polls every CHECK_INTERVAL seconds)
+    check_interval = int(os.environ.get("CHECK_INTERVAL", "2"))
+
     try:
-        while True:
+        for jsonl_files in watch_jsonl_files(check_interval):
+            # One wakeup is one burst of writes: stamp its matches once
+            batch_time = datetime.now().strftime("%H:%M:%S")
+            new_processed_ids = []
+            # Hits are collected per wakeup and tallied with Counter (in C)
+            new_dates = []  # One date per new message
+            pattern_hits = []  # One (pattern, date) per match
+            absolutely_projects = []  # One project per "absolutely" match
+
+            # Only new lines of changed files are read (see scan_jsonl_file)
+            for project_name, jsonl_file in jsonl_files:
+                file_state = scan_state.setdefault(jsonl_file, {})
+                for msg_id, date_str, message_patterns, first_match_text in scan_jsonl_file(
+                    jsonl_file, file_state
+                ):
+                    key = message_key(msg_id)
+                    if key in processed_ids:
+                        continue
+
+                    # Mark as processed
+                    processed_ids.add(key)
+                    new_processed_ids.append(key)
+                    new_dates.append(date_str)
+
+                    # Process pattern matches (count once per message)
+                    if message_patterns:
+                        pattern_hits.extend((pattern_name, date_str) for pattern_name in message_patterns)
+                        # Project counts are only kept for "absolutely"
+                        if "absolutely" in message_patterns:
+                            absolutely_projects.append(project_name)
+
+                        # Print notification (once per message)
+                        match_types = list(message_patterns)
+                        print(
+                            f"[{batch_time}] {', '.join(match_types).upper()} in {project_name}: {first_match_text}"
+                        )
+
+            # Fold this wakeup's tallies into the running counts
+            new_total_messages = len(new_dates)
+            for date_str, count in Counter(new_dates).items():
+                total_messages_counts[date_str] = total_messages_counts.get(date_str, 0) + count
+
             new_matches_by_pattern = {name: 0 for name in PATTERNS}
-            new_total_messages = 0
-
-            for project_dir in Path(CLAUDE_PROJECTS_BASE).iterdir():
-                if project_dir.is_dir() and not project_dir.name.startswith("."):
-                    project_name = get_project_display_name(project_dir.name)
-
-                    # Scan all JSONL files in this project
-                    for jsonl_file in project_dir.glob("*.jsonl"):
-                        # Single pass: count total messages and check for pattern matches
-                        try:
-                            with open(jsonl_file, "r") as f:
-                                for line in f:
-                                    try:
-                                        entry = json.loads(line)
-                                        result = process_message_entry(entry, compiled_patterns)
-
-                                        if not result:
-                                            continue
-
-                                        msg_id = result["msg_id"]
-                                        date_str = result["date_str"]
-
-                                        if msg_id in processed_ids:
-                                            continue
-
-                                        # Mark as processed
-                                        processed_ids.add(msg_id)
-
-                                        # Update total messages count
-                                        if date_str not in total_messages_counts:
-                                            total_messages_counts[date_str] = 0
-                                        total_messages_counts[date_str] += 1
-                                        new_total_messages += 1
-
-                                        # Process text blocks for pattern matches (count once per message)
-                                        message_patterns = set()
-                                        first_match_text = None
-                                        for text, matched_patterns in result["text_blocks"]:
-                                            if matched_patterns:
-                                                message_patterns.update(matched_patterns.keys())
-                                                if first_match_text is None:
-                                                    first_match_text = text
-
-                                        if message_patterns:
-                                            for pattern_name in message_patterns:
-                                                new_matches_by_pattern[pattern_name] += 1
-
-                                                # Update daily counts
-                                                if date_str not in pattern_counts[pattern_name]:
-                                                    pattern_counts[pattern_name][date_str] = 0
-                                                pattern_counts[pattern_name][date_str] += 1
-
-                                                # Update project counts (only for "absolutely")
-                                                if pattern_name == "absolutely":
-                                                    if project_name not in project_counts:
-                                                        project_counts[project_name] = 0
-                                                    project_counts[project_name] += 1
-
-                                            # Print notification (once per message)
-                                            match_types = list(message_patterns)
-                                            print(
-                                                f"[{datetime.now().strftime('%H:%M:%S')}] {', '.join(match_types).upper()} in {project_name}: {first_match_text.strip()[:100]}"
-                                            )
-
-                                    except:
-                                        continue
-                        except:
-                            pass
+            for (pattern_name, date_str), count in Counter(pattern_hits).items():
+                new_matches_by_pattern[pattern_name] += count
+                daily_counts = pattern_counts[pattern_name]
+                daily_counts[date_str] = daily_counts.get(date_str, 0) + count
+
+            for project_name, count in Counter(absolutely_projects).items():
+                project_counts[project_name] = project_counts.get(project_name, 0) + count
 
             if any(new_matches_by_pattern.values()) or new_total_messages > 0:
-                # Save all state
-                save_project_counts(project_counts)
-                save_processed_ids(processed_ids)
+                # Save state; count files are only rewritten when they changed
+                append_processed_ids(new_processed_ids)
+                save_scan_state(scan_state)
+                if new_matches_by_pattern.get("absolutely"):
+                    save_project_counts(project_counts)
                 for pattern_name, counts in pattern_counts.items():
-                    save_pattern_counts(pattern_name, counts)
-                save_total_messages_counts(total_messages_counts)
+                    if new_matches_by_pattern[pattern_name]:
+                        save_pattern_counts(pattern_name, counts)
+                if new_total_messages > 0:
+                    save_total_messages_counts(total_messages_counts)
 
                 updates = [
                     f"{name}: +{count}"
@@ -374,14 +361,14 @@ def main():
                             f"  ✓ Uploaded to API: {patterns_summary}, total_messages={today_total}"
                         )
 
-            time.sleep(int(os.environ.get("CHECK_INTERVAL", "2")))
-
     except KeyboardInterrupt:
         print("\n" + "-" * 50)
         print("Stopping watcher...")
         for name in PATTERNS:
             total = sum(pattern_counts[name].values())
             print(f"Final '{name}' count: {total}")
+    finally:
+        close_upload_logger(upload_logger)
 
 
 if __name__ == "__main__":
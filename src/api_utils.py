@@ -0,0 +1,75 @@
+"""Helpers shared by the counts and prompt words write endpoints."""
+import hmac
+import os
+from typing import Any, Dict, List, Optional, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Read once at import; the secret doesn't change while the server runs
+EXPECTED_SECRET = os.getenv("ABSOLUTELYRIGHT_SECRET")
+
+
+def check_secret(secret: Optional[str]) -> None:
+    """Raise 401 if ABSOLUTELYRIGHT_SECRET is set and the given secret doesn't match."""
+    if EXPECTED_SECRET:
+        # Constant-time comparison, so response timing doesn't leak the secret
+        if not secret or not hmac.compare_digest(secret.encode(), EXPECTED_SECRET.encode()):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid secret"
+            )
+
+
+def extra_counts(payload: BaseModel) -> Dict[str, int]:
+    """Return the numeric undeclared fields of a request (pattern or word counts)."""
+    # model_extra holds only undeclared fields, so day, secret, etc. are never counts
+    return {
+        key: value
+        for key, value in (payload.model_extra or {}).items()
+        if isinstance(value, int)
+    }
+
+
+def validate_days(
+    request_model: Type[BaseModel],
+    days: List[Dict[str, Any]],
+    workstation_id: str
+) -> List[BaseModel]:
+    """Validate each day of a bulk request as request_model; raise 422 on the first invalid one."""
+    payloads = []
+    for day_data in days:
+        try:
+            payloads.append(
+                request_model.model_validate({**day_data, "workstation_id": workstation_id})
+            )
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=e.errors()
+            )
+    return payloads
+
+
+async def upsert_rows(session: AsyncSession, model, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert or update rows of model in one UPSERT statement (caller commits).
+
+    Rows are matched on the primary key; every other column is overwritten.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    stmt = sqlite_insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(table.primary_key.columns),
+        set_={
+            column.name: stmt.excluded[column.name]
+            for column in table.columns
+            if not column.primary_key
+        },
+    )
+    await session.execute(stmt, rows)
@@ -1,6 +1,7 @@
 """Database configuration and connection management."""
 import os
 from pathlib import Path
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
@@ -30,6 +31,19 @@ engine = create_async_engine(
     future=True,
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection for the watcher writes + dashboard reads."""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run while a write commits; NORMAL skips the fsync per
+    # commit that WAL makes unnecessary for durability against app crashes
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 # Create async session factory
 async_session_maker = async_sessionmaker(
     engine,
@@ -45,10 +59,31 @@ Base = declarative_base()
 # This ensures tables are created when init_db() is called
 def _import_models():
     """Import all models to ensure they're registered."""
-    from src.models import DayCount  # noqa: F401
+    from src.models import DataVersion, DayCount  # noqa: F401
     from src.prompt_words.models import PromptWordCount  # noqa: F401
 
 
+# Tables whose every write bumps their row in data_versions, so cached
+# responses notice changes made by any connection or process
+VERSIONED_TABLES = ("day_counts", "prompt_word_counts")
+
+
+def _create_version_triggers(conn) -> None:
+    """Create the data_versions rows and the triggers that bump them."""
+    for table in VERSIONED_TABLES:
+        conn.execute(
+            text("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (:table, 0)"),
+            {"table": table},
+        )
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_version_after_{operation.lower()} "
+                f"AFTER {operation} ON {table} BEGIN "
+                f"UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}'; "
+                f"END"
+            ))
+
+
 async def init_db():
     """Initialize database tables."""
     # Import models first to register them
@@ -56,6 +91,7 @@ async def init_db():
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_version_triggers)
 
 
 async def get_session() -> AsyncSession:
@@ -1,16 +1,18 @@
 """FastAPI backend for Absolutely Right tracking application."""
 import os
-import json
+import orjson
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Dict, Optional
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select, true
 from pydantic import BaseModel
 
+from src import response_cache
+from src.api_utils import check_secret, extra_counts, upsert_rows, validate_days
 from src.database import init_db, get_session
 from src.models import DayCount
 from src.prompt_words.routes import router as prompt_words_router
@@ -50,121 +52,132 @@ class SetRequest(BaseModel):
         extra = "allow"  # Allow additional fields for patterns
 
 
+class SetBulkRequest(BaseModel):
+    workstation_id: str
+    # Each item has the same fields as SetRequest, minus workstation_id/secret
+    days: List[Dict[str, Any]]
+    secret: Optional[str] = None
+
+
 @app.get("/api/today")
-async def get_today(session: AsyncSession = Depends(get_session)) -> JSONResponse:
+async def get_today(request: Request, session: AsyncSession = Depends(get_session)) -> Response:
     """Get today's counts aggregated across all workstations."""
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    # Reuse the serialized response until the data (or the day) changes
+    signature = (today, await response_cache.table_version(session, DayCount.__tablename__))
+    cached = response_cache.get("today", signature)
+
+    if cached is None:
+        # Sum each pattern across today's workstation records in SQLite (JSON1)
+        # instead of parsing every stored JSON blob here
+        patterns = func.json_each(DayCount.patterns).table_valued("key", "value", "id")
+        result = await session.execute(
+            select(patterns.c.key, func.sum(patterns.c.value))
+            .select_from(DayCount)
+            .join(patterns, true())
+            .where(DayCount.day == today, func.json_valid(DayCount.patterns))
+            .group_by(patterns.c.key)
+            .order_by(func.min(patterns.c.id), patterns.c.key)
+        )
+        aggregated_total = await session.scalar(
+            select(func.coalesce(func.sum(DayCount.total_messages), 0)).where(DayCount.day == today)
+        )
 
-    # Fetch ALL workstation records for today
-    result = await session.execute(
-        select(DayCount).where(DayCount.day == today)
-    )
-    day_counts = result.scalars().all()
-
-    # Aggregate across workstations
-    from collections import defaultdict
-    aggregated_patterns: Dict[str, int] = defaultdict(int)
-    aggregated_total = 0
-
-    for record in day_counts:
-        # Parse patterns JSON
-        try:
-            patterns = json.loads(record.patterns)
-            for pattern, count in patterns.items():
-                aggregated_patterns[pattern] += count
-        except json.JSONDecodeError:
-            pass
-        aggregated_total += record.total_messages or 0
-
-    # Build response (workstation_id hidden from API)
-    response_data = dict(aggregated_patterns)
-    response_data["total_messages"] = aggregated_total
+        # Build response (workstation_id hidden from API)
+        response_data = dict(result.all())
+        response_data["total_messages"] = aggregated_total
+        cached = response_cache.put("today", signature, response_data)
 
     # Cache for 1 minute
-    return JSONResponse(
-        content=response_data,
-        headers={"Cache-Control": "public, max-age=60"}
-    )
+    return response_cache.json_response(request, cached, max_age=60)
 
 
 @app.get("/api/history")
-async def get_history(session: AsyncSession = Depends(get_session)) -> JSONResponse:
+async def get_history(request: Request, session: AsyncSession = Depends(get_session)) -> Response:
     """Get historical counts aggregated across all workstations."""
-    # Fetch all records ordered by day
-    result = await session.execute(
-        select(DayCount).order_by(DayCount.day)
-    )
-    all_records = result.scalars().all()
-
-    # Group by day, aggregate across workstations
-    from collections import defaultdict
-    by_day: Dict[str, Dict] = defaultdict(lambda: {"patterns": defaultdict(int), "total": 0})
-
-    for record in all_records:
-        # Parse patterns JSON
-        try:
-            patterns = json.loads(record.patterns)
-            for pattern, count in patterns.items():
-                by_day[record.day]["patterns"][pattern] += count
-        except json.JSONDecodeError:
-            pass
-        by_day[record.day]["total"] += record.total_messages or 0
-
-    # Build response (workstation_id hidden from API)
-    history = []
-    for day in sorted(by_day.keys()):
-        day_data = {"day": day}
-        day_data.update(by_day[day]["patterns"])
-        day_data["total_messages"] = by_day[day]["total"]
-        history.append(day_data)
+    # Reuse the serialized response until the data changes
+    signature = await response_cache.table_version(session, DayCount.__tablename__)
+    cached = response_cache.get("history", signature)
+
+    if cached is None:
+        # Sum each pattern per day across workstations in SQLite (JSON1),
+        # keeping patterns in the order they are stored
+        patterns = func.json_each(DayCount.patterns).table_valued("key", "value", "id")
+        result = await session.execute(
+            select(DayCount.day, patterns.c.key, func.sum(patterns.c.value))
+            .select_from(DayCount)
+            .join(patterns, true())
+            .where(func.json_valid(DayCount.patterns))
+            .group_by(DayCount.day, patterns.c.key)
+            .order_by(DayCount.day, func.min(patterns.c.id), patterns.c.key)
+        )
+        from collections import defaultdict
+        pattern_counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for day, pattern, count in result:
+            pattern_counts[day][pattern] = count
+
+        # Days with records but no patterns still get a total
+        result = await session.execute(
+            select(DayCount.day, func.coalesce(func.sum(DayCount.total_messages), 0))
+            .group_by(DayCount.day)
+            .order_by(DayCount.day)
+        )
+
+        # Build response (workstation_id hidden from API)
+        history = []
+        for day, total in result:
+            day_data = {"day": day}
+            day_data.update(pattern_counts[day])
+            day_data["total_messages"] = total
+            history.append(day_data)
+        cached = response_cache.put("history", signature, history)
 
     # Cache for 5 minutes
-    return JSONResponse(
-        content=history,
-        headers={"Cache-Control": "public, max-age=300"}
-    )
+    return response_cache.json_response(request, cached, max_age=300)
 
 
 @app.get("/api/by-workstation")
-async def get_by_workstation(session: AsyncSession = Depends(get_session)) -> JSONResponse:
+async def get_by_workstation(request: Request, session: AsyncSession = Depends(get_session)) -> Response:
     """Get data grouped by workstation for debugging/inspection."""
-    # Fetch all records ordered by day and workstation
-    result = await session.execute(
-        select(DayCount).order_by(DayCount.day, DayCount.workstation_id)
-    )
-    all_records = result.scalars().all()
-
-    # Group by workstation, then by day
-    from collections import defaultdict
-    by_workstation: Dict[str, list] = defaultdict(list)
-
-    for record in all_records:
-        # Parse patterns JSON
-        try:
-            patterns = json.loads(record.patterns)
-        except json.JSONDecodeError:
-            patterns = {}
-
-        day_data = {
-            "day": record.day,
-            "total_messages": record.total_messages or 0
-        }
-        day_data.update(patterns)
-        by_workstation[record.workstation_id].append(day_data)
-
-    # Build response with workstation_id exposed
-    response = []
-    for workstation_id in sorted(by_workstation.keys()):
-        response.append({
-            "workstation_id": workstation_id,
-            "history": by_workstation[workstation_id]
-        })
+    # Reuse the serialized response until the data changes
+    signature = await response_cache.table_version(session, DayCount.__tablename__)
+    cached = response_cache.get("by_workstation", signature)
+
+    if cached is None:
+        # Stream plain column tuples in response order (by workstation, then
+        # by day) instead of loading the whole table as DayCount objects
+        rows = await session.stream(
+            select(DayCount.workstation_id, DayCount.day, DayCount.patterns, DayCount.total_messages)
+            .order_by(DayCount.workstation_id, DayCount.day)
+            .execution_options(yield_per=500)
+        )
+
+        # Group consecutive rows into one entry per workstation
+        response = []
+        async for workstation_id, day, patterns_json, total_messages in rows:
+            # Parse patterns JSON
+            try:
+                patterns = orjson.loads(patterns_json)
+            except orjson.JSONDecodeError:
+                patterns = {}
+
+            day_data = {
+                "day": day,
+                "total_messages": total_messages or 0
+            }
+            day_data.update(patterns)
+
+            if not response or response[-1]["workstation_id"] != workstation_id:
+                response.append({
+                    "workstation_id": workstation_id,
+                    "history": []
+                })
+            response[-1]["history"].append(day_data)
+        cached = response_cache.put("by_workstation", signature, response)
 
     # Cache for 1 minute
-    return JSONResponse(
-        content=response,
-        headers={"Cache-Control": "public, max-age=60"}
-    )
+    return response_cache.json_response(request, cached, max_age=60)
 
 
 @app.get("/2")
@@ -189,21 +202,8 @@ async def redirect_prompt_words():
     return RedirectResponse(url="/things-i-tell-claude", status_code=301)
 
 
-@app.post("/api/set")
-async def set_day(
-    payload: SetRequest,
-    session: AsyncSession = Depends(get_session)
-) -> JSONResponse:
-    """Set counts for a specific day."""
-    # Check secret if ABSOLUTELYRIGHT_SECRET is set
-    expected_secret = os.getenv("ABSOLUTELYRIGHT_SECRET")
-    if expected_secret:
-        if not payload.secret or payload.secret != expected_secret:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid secret"
-            )
-
+def day_row(payload: SetRequest) -> Dict[str, Any]:
+    """Build the DayCount column values for one workstation's counts on a day."""
     # Build patterns map - support both old and new formats
     patterns_map: Dict[str, int] = {}
 
@@ -213,42 +213,41 @@ async def set_day(
     if payload.right_count is not None:
         patterns_map["right"] = payload.right_count
 
-    # New format: extract numeric values from additional fields
-    payload_dict = payload.model_dump()
-    for key, value in payload_dict.items():
-        # Skip known non-pattern fields
-        if key in ["day", "total_messages", "secret", "count", "right_count", "workstation_id"]:
-            continue
-        # Include numeric values as patterns
-        if isinstance(value, int):
-            patterns_map[key] = value
-
-    patterns_json = json.dumps(patterns_map)
-    total_messages = payload.total_messages or 0
-
-    # Check if record exists for this workstation
-    result = await session.execute(
-        select(DayCount).where(
-            DayCount.day == payload.day,
-            DayCount.workstation_id == payload.workstation_id
-        )
-    )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        # Update existing record for this workstation
-        existing.patterns = patterns_json
-        existing.total_messages = total_messages
-    else:
-        # Create new record for this workstation
-        new_record = DayCount(
-            day=payload.day,
-            workstation_id=payload.workstation_id,
-            patterns=patterns_json,
-            total_messages=total_messages
-        )
-        session.add(new_record)
+    # New format: numeric values of the additional fields
+    patterns_map.update(extra_counts(payload))
+
+    return {
+        "day": payload.day,
+        "workstation_id": payload.workstation_id,
+        "patterns": orjson.dumps(patterns_map).decode(),
+        "total_messages": payload.total_messages or 0,
+    }
+
+
+@app.post("/api/set")
+async def set_day(
+    payload: SetRequest,
+    session: AsyncSession = Depends(get_session)
+) -> JSONResponse:
+    """Set counts for a specific day."""
+    check_secret(payload.secret)
+
+    await upsert_rows(session, DayCount, [day_row(payload)])
+    await session.commit()
+
+    return JSONResponse(content="ok")
+
+
+@app.post("/api/set_bulk")
+async def set_days_bulk(
+    payload: SetBulkRequest,
+    session: AsyncSession = Depends(get_session)
+) -> JSONResponse:
+    """Set counts for many days in one request and one commit (used by backfill)."""
+    check_secret(payload.secret)
 
+    day_payloads = validate_days(SetRequest, payload.days, payload.workstation_id)
+    await upsert_rows(session, DayCount, [day_row(day_payload) for day_payload in day_payloads])
     await session.commit()
 
     return JSONResponse(content="ok")
@@ -15,3 +15,12 @@ class DayCount(Base):
 
     def __repr__(self):
         return f"<DayCount(day={self.day}, workstation_id={self.workstation_id}, total_messages={self.total_messages})>"
+
+
+class DataVersion(Base):
+    """Change counter per counts table, bumped by SQLite triggers on every write (see init_db)."""
+
+    __tablename__ = "data_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
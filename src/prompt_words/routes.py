@@ -1,14 +1,15 @@
 """FastAPI routes for prompt words tracking."""
-import os
-import json
+import orjson
 from datetime import datetime, timezone
-from typing import Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select, true
 from pydantic import BaseModel
 
+from src import response_cache
+from src.api_utils import check_secret, extra_counts, upsert_rows, validate_days
 from src.database import get_session
 from src.prompt_words.models import PromptWordCount
 
@@ -28,79 +29,99 @@ class SetPromptWordsRequest(BaseModel):
         extra = "allow"  # Allow additional fields for word counts
 
 
+class SetPromptWordsBulkRequest(BaseModel):
+    workstation_id: str
+    # Each item has the same fields as SetPromptWordsRequest, minus workstation_id/secret
+    days: List[Dict[str, Any]]
+    secret: Optional[str] = None
+
+
 @router.get("/today")
-async def get_today(session: AsyncSession = Depends(get_session)) -> JSONResponse:
+async def get_today(request: Request, session: AsyncSession = Depends(get_session)) -> Response:
     """Get today's prompt word counts aggregated across all workstations."""
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-
-    # Fetch ALL workstation records for today
-    result = await session.execute(
-        select(PromptWordCount).where(PromptWordCount.day == today)
-    )
-    word_counts = result.scalars().all()
-
-    # Aggregate across workstations
-    from collections import defaultdict
-    aggregated_words: Dict[str, int] = defaultdict(int)
-    aggregated_total = 0
-
-    for record in word_counts:
-        # Parse words JSON
-        try:
-            words = json.loads(record.words)
-            for word, count in words.items():
-                aggregated_words[word] += count
-        except json.JSONDecodeError:
-            pass
-        aggregated_total += record.total_user_messages or 0
-
-    # Build response (workstation_id hidden from API)
-    response_data = dict(aggregated_words)
-    response_data["total_user_messages"] = aggregated_total
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    # Reuse the serialized response until the data (or the day) changes
+    signature = (today, await response_cache.table_version(session, PromptWordCount.__tablename__))
+    cached = response_cache.get("prompt_words_today", signature)
+
+    if cached is None:
+        # Sum each word across today's workstation records in SQLite (JSON1)
+        # instead of parsing every stored JSON blob here
+        words = func.json_each(PromptWordCount.words).table_valued("key", "value", "id")
+        result = await session.execute(
+            select(words.c.key, func.sum(words.c.value))
+            .select_from(PromptWordCount)
+            .join(words, true())
+            .where(PromptWordCount.day == today, func.json_valid(PromptWordCount.words))
+            .group_by(words.c.key)
+            .order_by(func.min(words.c.id), words.c.key)
+        )
+        aggregated_total = await session.scalar(
+            select(func.coalesce(func.sum(PromptWordCount.total_user_messages), 0)).where(PromptWordCount.day == today)
+        )
+
+        # Build response (workstation_id hidden from API)
+        response_data = dict(result.all())
+        response_data["total_user_messages"] = aggregated_total
+        cached = response_cache.put("prompt_words_today", signature, response_data)
 
     # Cache for 1 minute
-    return JSONResponse(
-        content=response_data,
-        headers={"Cache-Control": "public, max-age=60"}
-    )
+    return response_cache.json_response(request, cached, max_age=60)
 
 
 @router.get("/history")
-async def get_history(session: AsyncSession = Depends(get_session)) -> JSONResponse:
+async def get_history(request: Request, session: AsyncSession = Depends(get_session)) -> Response:
     """Get historical prompt word counts aggregated across all workstations."""
-    # Fetch all records ordered by day
-    result = await session.execute(
-        select(PromptWordCount).order_by(PromptWordCount.day)
-    )
-    all_records = result.scalars().all()
-
-    # Group by day, aggregate across workstations
-    from collections import defaultdict
-    by_day: Dict[str, Dict] = defaultdict(lambda: {"words": defaultdict(int), "total": 0})
-
-    for record in all_records:
-        # Parse words JSON
-        try:
-            words = json.loads(record.words)
-            for word, count in words.items():
-                by_day[record.day]["words"][word] += count
-        except json.JSONDecodeError:
-            pass
-        by_day[record.day]["total"] += record.total_user_messages or 0
-
-    # Build response (workstation_id hidden from API)
-    history = []
-    for day in sorted(by_day.keys()):
-        day_data = {"day": day}
-        day_data.update(by_day[day]["words"])
-        day_data["total_user_messages"] = by_day[day]["total"]
-        history.append(day_data)
+    # Reuse the serialized response until the data changes
+    signature = await response_cache.table_version(session, PromptWordCount.__tablename__)
+    cached = response_cache.get("prompt_words_history", signature)
+
+    if cached is None:
+        # Sum each word per day across workstations in SQLite (JSON1),
+        # keeping words in the order they are stored
+        words = func.json_each(PromptWordCount.words).table_valued("key", "value", "id")
+        result = await session.execute(
+            select(PromptWordCount.day, words.c.key, func.sum(words.c.value))
+            .select_from(PromptWordCount)
+            .join(words, true())
+            .where(func.json_valid(PromptWordCount.words))
+            .group_by(PromptWordCount.day, words.c.key)
+            .order_by(PromptWordCount.day, func.min(words.c.id), words.c.key)
+        )
+        from collections import defaultdict
+        word_counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for day, word, count in result:
+            word_counts[day][word] = count
+
+        # Days with records but no words still get a total
+        result = await session.execute(
+            select(PromptWordCount.day, func.coalesce(func.sum(PromptWordCount.total_user_messages), 0))
+            .group_by(PromptWordCount.day)
+            .order_by(PromptWordCount.day)
+        )
+
+        # Build response (workstation_id hidden from API)
+        history = []
+        for day, total in result:
+            day_data = {"day": day}
+            day_data.update(word_counts[day])
+            day_data["total_user_messages"] = total
+            history.append(day_data)
+        cached = response_cache.put("prompt_words_history", signature, history)
 
     # Cache for 5 minutes
-    return JSONResponse(
-        content=history,
-        headers={"Cache-Control": "public, max-age=300"}
-    )
+    return response_cache.json_response(request, cached, max_age=300)
+
+
+def day_row(payload: SetPromptWordsRequest) -> Dict[str, Any]:
+    """Build the PromptWordCount column values for one workstation's word counts on a day."""
+    return {
+        "day": payload.day,
+        "workstation_id": payload.workstation_id,
+        "words": orjson.dumps(extra_counts(payload)).decode(),
+        "total_user_messages": payload.total_user_messages or 0,
+    }
 
 
 @router.post("/set")
@@ -109,52 +130,23 @@ async def set_day(
     session: AsyncSession = Depends(get_session)
 ) -> JSONResponse:
     """Set prompt word counts for a specific day."""
-    # Check secret if ABSOLUTELYRIGHT_SECRET is set
-    expected_secret = os.getenv("ABSOLUTELYRIGHT_SECRET")
-    if expected_secret:
-        if not payload.secret or payload.secret != expected_secret:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid secret"
-            )
-
-    # Build words map - extract numeric values from additional fields
-    words_map: Dict[str, int] = {}
-    payload_dict = payload.model_dump()
-    for key, value in payload_dict.items():
-        # Skip known non-word fields
-        if key in ["day", "total_user_messages", "secret", "workstation_id"]:
-            continue
-        # Include numeric values as word counts
-        if isinstance(value, int):
-            words_map[key] = value
-
-    words_json = json.dumps(words_map)
-    total_user_messages = payload.total_user_messages or 0
-
-    # Check if record exists for this workstation
-    result = await session.execute(
-        select(PromptWordCount).where(
-            PromptWordCount.day == payload.day,
-            PromptWordCount.workstation_id == payload.workstation_id
-        )
-    )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        # Update existing record for this workstation
-        existing.words = words_json
-        existing.total_user_messages = total_user_messages
-    else:
-        # Create new record for this workstation
-        new_record = PromptWordCount(
-            day=payload.day,
-            workstation_id=payload.workstation_id,
-            words=words_json,
-            total_user_messages=total_user_messages
-        )
-        session.add(new_record)
+    check_secret(payload.secret)
+    await upsert_rows(session, PromptWordCount, [day_row(payload)])
+    await session.commit()
+
+    return JSONResponse(content="ok")
+
+
+@router.post("/bulk-set")
+async def set_days_bulk(
+    payload: SetPromptWordsBulkRequest,
+    session: AsyncSession = Depends(get_session)
+) -> JSONResponse:
+    """Set word counts for many days in one request and one commit (used by backfill)."""
+    check_secret(payload.secret)
 
+    day_payloads = validate_days(SetPromptWordsRequest, payload.days, payload.workstation_id)
+    await upsert_rows(session, PromptWordCount, [day_row(day_payload) for day_payload in day_payloads])
     await session.commit()
 
     return JSONResponse(content="ok")
@@ -0,0 +1,65 @@
+"""In-process cache for serialized API responses."""
+from hashlib import blake2b
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import DataVersion
+
+# A serialized JSON body and its ETag
+CachedBody = Tuple[bytes, str]
+
+# Cache key -> (signature, cached body)
+_cache: Dict[str, Tuple[Any, CachedBody]] = {}
+
+
+async def table_version(session: AsyncSession, table_name: str) -> Optional[int]:
+    """
+    Return the change counter of a counts table (one primary-key lookup).
+
+    SQLite triggers bump it on every insert, update and delete, whoever makes
+    them, so it also covers direct writes such as restore_backup.py.
+    """
+    return await session.scalar(
+        select(DataVersion.version).where(DataVersion.table_name == table_name)
+    )
+
+
+def get(key: str, signature: Any) -> Optional[CachedBody]:
+    """Return the cached body for key if it was stored with the same signature."""
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    return None
+
+
+def put(key: str, signature: Any, content: Any) -> CachedBody:
+    """Serialize content, cache it (with its ETag) under key and return it."""
+    body = orjson.dumps(content)
+    cached = (body, f'"{blake2b(body, digest_size=8).hexdigest()}"')
+    _cache[key] = (signature, cached)
+    return cached
+
+
+def json_response(request: Request, cached: CachedBody, max_age: int) -> Response:
+    """
+    Return a cached body as a JSON response with its strong ETag.
+
+    Answers 304 Not Modified, without the body, when the client's
+    If-None-Match already names this ETag.
+    """
+    body, etag = cached
+    headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": etag}
+
+    # If-None-Match uses the weak comparison, so a W/ prefix still matches
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
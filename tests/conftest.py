@@ -0,0 +1,23 @@
+"""Shared setup for the test suite."""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(ROOT, "scripts")
+
+# The scripts read HOME, CLAUDE_PROJECTS and WORKSTATION_ID at import time,
+# so point them at a scratch directory before any test imports them
+_home = tempfile.mkdtemp(prefix="absolutelyright-tests-")
+os.environ["HOME"] = _home
+os.environ["CLAUDE_PROJECTS"] = os.path.join(_home, "projects")
+os.environ["WORKSTATION_ID"] = "test-workstation"
+
+# The server reads its database path and secret at import time too
+os.environ["DATABASE_PATH"] = os.path.join(_home, "counts.db")
+os.environ["ABSOLUTELYRIGHT_SECRET"] = "test-secret"
+
+# The scripts import each other as top-level modules
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, "prompt_words"))
@@ -0,0 +1,113 @@
+"""Tests for the write endpoints of the API server."""
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+SECRET = "test-secret"
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Entering the client runs the lifespan, which creates the tables
+    with TestClient(app) as client:
+        yield client
+
+
+def day_counts(client, workstation_id):
+    """Return {day: counts} for one workstation from /api/by-workstation"""
+    for workstation in client.get("/api/by-workstation").json():
+        if workstation["workstation_id"] == workstation_id:
+            return {day["day"]: day for day in workstation["history"]}
+    return {}
+
+
+def test_set_bulk_inserts_then_overwrites_days(client):
+    response = client.post("/api/set_bulk", json={
+        "workstation_id": "bulk-upsert",
+        "secret": SECRET,
+        "days": [
+            {"day": "2025-01-01", "absolutely": 1, "total_messages": 10},
+            {"day": "2025-01-02", "absolutely": 2, "right": 1, "total_messages": 20},
+        ],
+    })
+    assert response.status_code == 200
+
+    response = client.post("/api/set_bulk", json={
+        "workstation_id": "bulk-upsert",
+        "secret": SECRET,
+        "days": [{"day": "2025-01-02", "absolutely": 5, "total_messages": 30}],
+    })
+    assert response.status_code == 200
+
+    days = day_counts(client, "bulk-upsert")
+    assert days["2025-01-01"]["absolutely"] == 1
+    assert days["2025-01-01"]["total_messages"] == 10
+    # The second upload replaces the whole row, not just the fields it sends
+    assert days["2025-01-02"]["absolutely"] == 5
+    assert "right" not in days["2025-01-02"]
+    assert days["2025-01-02"]["total_messages"] == 30
+
+
+@pytest.mark.parametrize("secret", [None, "wrong-secret"])
+def test_set_bulk_rejects_a_wrong_secret(client, secret):
+    payload = {
+        "workstation_id": "bulk-unauthorized",
+        "days": [{"day": "2025-01-01", "absolutely": 1}],
+    }
+    if secret:
+        payload["secret"] = secret
+
+    assert client.post("/api/set_bulk", json=payload).status_code == 401
+    assert day_counts(client, "bulk-unauthorized") == {}
+
+
+def test_set_bulk_rejects_an_invalid_day_without_writing_any(client):
+    response = client.post("/api/set_bulk", json={
+        "workstation_id": "bulk-invalid",
+        "secret": SECRET,
+        "days": [
+            {"day": "2025-01-01", "absolutely": 1},
+            {"absolutely": 2},  # missing "day"
+        ],
+    })
+
+    assert response.status_code == 422
+    assert day_counts(client, "bulk-invalid") == {}
+
+
+def test_prompt_words_bulk_set_inserts_then_overwrites_days(client):
+    for words in ({"please": 1, "thanks": 2}, {"please": 4}):
+        response = client.post("/api/things-i-tell-claude/bulk-set", json={
+            "workstation_id": "words-upsert",
+            "secret": SECRET,
+            "days": [{"day": "2025-02-01", **words, "total_user_messages": 7}],
+        })
+        assert response.status_code == 200
+
+    history = client.get("/api/things-i-tell-claude/history").json()
+    day = next(day for day in history if day["day"] == "2025-02-01")
+    assert day["please"] == 4
+    assert "thanks" not in day
+    assert day["total_user_messages"] == 7
+
+
+def test_prompt_words_bulk_set_rejects_a_wrong_secret(client):
+    response = client.post("/api/things-i-tell-claude/bulk-set", json={
+        "workstation_id": "words-unauthorized",
+        "secret": "wrong-secret",
+        "days": [{"day": "2025-02-02", "please": 1}],
+    })
+    assert response.status_code == 401
+
+
+def test_prompt_words_bulk_set_rejects_an_invalid_day(client):
+    response = client.post("/api/things-i-tell-claude/bulk-set", json={
+        "workstation_id": "words-invalid",
+        "secret": SECRET,
+        "days": [{"day": "2025-02-03", "please": 1}, {"please": 2}],
+    })
+    assert response.status_code == 422
+
+    history = client.get("/api/things-i-tell-claude/history").json()
+    assert all(day["day"] != "2025-02-03" for day in history)
@@ -0,0 +1,79 @@
+"""Tests for the matching helpers shared by both counters."""
+import re
+
+import pytest
+
+import counter_core
+
+
+def search_mask(patterns, text):
+    """Reference result: each pattern searched on its own"""
+    return sum(
+        1 << i
+        for i, pattern in enumerate(patterns.values())
+        if re.search(pattern, text, re.IGNORECASE)
+    )
+
+
+OVERLAPPING_CONFIGS = [
+    {"absolutely": "You're absolutely right", "right": "right"},
+    {"please": r"\bplease\b", "ease": "ease"},
+    {"thanks": r"\b(thanks|thank you)\b", "thank": "thank"},
+    {"short": "fuck", "long": "fucking"},
+]
+
+TEXTS = [
+    "You're absolutely right!",
+    "You're absolutely right, and right again",
+    "That's right.",
+    "please",
+    "Please, with ease",
+    "thank you",
+    "Thanks a lot",
+    "fucking hell",
+    "nothing to see here",
+    "",
+]
+
+
+@pytest.mark.parametrize("patterns", OVERLAPPING_CONFIGS)
+@pytest.mark.parametrize("text", TEXTS)
+def test_match_pattern_mask_reports_overlapping_patterns(patterns, text):
+    matcher = counter_core.build_pattern_matcher(patterns)
+    assert counter_core.match_pattern_mask(matcher, text) == search_mask(patterns, text)
+
+
+def test_match_pattern_mask_reports_pattern_inside_another_match():
+    patterns = {"absolutely": "You're absolutely right", "right": "right"}
+    matcher = counter_core.build_pattern_matcher(patterns)
+    assert counter_core.match_pattern_mask(matcher, "You're absolutely right") == 0b11
+
+
+@pytest.mark.parametrize("text", ["You're abſolutely right", "That's rıght", "KELVIN: Kelvin"])
+def test_literal_prefilter_keeps_ignorecase_variants(text):
+    patterns = {"absolutely": "You're absolutely right", "right": "right", "kelvin": "kelvin"}
+    matcher = counter_core.build_pattern_matcher(patterns)
+    assert matcher.prefilter is not None
+    assert counter_core.match_pattern_mask(matcher, text) == search_mask(patterns, text)
+
+
+def test_message_key_stores_canonical_uuids_as_bytes():
+    msg_id = "0f8fad5b-d9cb-469f-a165-70867728950e"
+    key = counter_core.message_key(msg_id)
+    assert key == bytes.fromhex("0f8fad5bd9cb469fa16570867728950e")
+    assert counter_core.message_id_from_key(key) == msg_id
+
+
+@pytest.mark.parametrize(
+    "msg_id",
+    [
+        "0F8FAD5B-D9CB-469F-A165-70867728950E",
+        "0f8fad5bd9cb469fa16570867728950e",
+        "{0f8fad5b-d9cb-469f-a165-70867728950e}",
+        "urn:uuid:0f8fad5b-d9cb-469f-a165-70867728950e",
+        "req_011CTbq8Xa6XFZ3pqBSjH9YR",
+    ],
+)
+def test_message_key_keeps_other_ids_as_strings(msg_id):
+    assert counter_core.message_key(msg_id) == msg_id
+    assert counter_core.message_id_from_key(counter_core.message_key(msg_id)) == msg_id
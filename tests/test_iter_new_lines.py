@@ -0,0 +1,84 @@
+"""Tests for the incremental JSONL reader used by the watchers."""
+import os
+
+from counter_core import iter_new_lines
+
+
+def read(path, state):
+    return list(iter_new_lines(str(path), state))
+
+
+def test_without_state_every_line_is_read_including_a_partial_one(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(b"a\nb\nc")
+
+    assert read(path, None) == [b"a", b"b", b"c"]
+
+
+def test_appended_lines_are_read_from_the_last_offset(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(b"a\nb\n")
+    state = {}
+    assert read(path, state) == [b"a", b"b"]
+
+    with open(path, "ab") as f:
+        f.write(b"c\n")
+    assert read(path, state) == [b"c"]
+    assert state["offset"] == 6
+
+
+def test_unchanged_file_yields_nothing(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(b"a\n")
+    state = {}
+    read(path, state)
+
+    assert read(path, state) == []
+
+
+def test_partial_trailing_line_waits_until_it_is_complete(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(b"a\nhalf")
+    state = {}
+    assert read(path, state) == [b"a"]
+    assert state["offset"] == 2
+
+    with open(path, "ab") as f:
+        f.write(b"-line\n")
+    assert read(path, state) == [b"half-line"]
+
+
+def test_truncated_file_is_read_again_from_the_start(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(b"first\nsecond\n")
+    state = {}
+    read(path, state)
+
+    path.write_bytes(b"new\n")
+    assert read(path, state) == [b"new"]
+
+
+def test_replaced_file_is_read_again_from_the_start(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(b"a\n")
+    state = {}
+    read(path, state)
+
+    # Rotation: a longer file with a new inode takes the old one's place
+    replacement = tmp_path / "replacement.jsonl"
+    replacement.write_bytes(b"x\ny\nz\n")
+    os.replace(replacement, path)
+    assert read(path, state) == [b"x", b"y", b"z"]
+
+
+def test_mtime_only_change_reads_no_lines_and_updates_the_state(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_bytes(b"a\n")
+    state = {}
+    read(path, state)
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert read(path, state) == []
+    assert state["mtime"] == os.stat(path).st_mtime
+    assert state["offset"] == 2
@@ -0,0 +1,129 @@
+"""Tests for the literal prefilter that lets the counters skip texts without running a regex."""
+import re
+
+import pytest
+
+from counter_core import build_literal_prefilter, fold_case, literal_prefixes
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        # Plain literals
+        ("please", ["please"]),
+        ("You're absolutely right", ["You're absolutely right"]),
+        # Zero-width assertions are skipped
+        (r"\bplease\b", ["please"]),
+        ("^please", ["please"]),
+        # Groups and alternation
+        ("(thanks|thank you|thx)", ["thanks", "thank you", "thx"]),
+        (r"\b(fuck|fucking|fucked|fck)\b", ["fuck", "fucking", "fucked", "fck"]),
+        ("(?:ab|cd)e", ["ab", "cd"]),
+        ("abc|def", ["abc", "def"]),
+        ("ab(c|d)", ["abc", "abd"]),
+        ("a(b(c|d))", ["abc", "abd"]),
+        # Optional quantifiers drop the character or group they apply to
+        ("colou?r", ["colo"]),
+        ("ab*c", ["a"]),
+        ("ab{0,2}c", ["a"]),
+        ("ab+c", ["ab"]),
+        ("ab??c", ["a"]),
+        ("ab(cd)?e", ["ab"]),
+        ("ab(cd)*e", ["ab"]),
+        ("(ab)+c", ["ab"]),
+        # Escapes end the literal
+        (r"a\.b", ["a"]),
+        (r"ab\d", ["ab"]),
+        (r"\d+ items", None),
+        # Character classes end the literal
+        ("[Yy]es", None),
+        ("ye[sp]", ["ye"]),
+        ("a.c", ["a"]),
+        # Lookarounds, inline flags and named groups aren't expanded
+        ("(?=ab)abc", None),
+        ("(?i)abc", None),
+        ("(?P<x>ab)c", None),
+        ("ab(?=c)", ["ab"]),
+        # No literal at all, or one alternative without a literal
+        ("a*", None),
+        ("abc|x?y", None),
+        ("(abc)?", None),
+        # Brackets inside a character class don't open or close a group
+        ("(a[)]|b)c", ["a", "b"]),
+        ("(a[^]|]|b)c", ["a", "b"]),
+        (r"(a[\]|]|b)c", ["a", "b"]),
+        ("a[]|]b|c", ["a", "c"]),
+    ],
+)
+def test_literal_prefixes(pattern, expected):
+    assert literal_prefixes(pattern) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Please", "please"),
+        ("abſolutely", "absolutely"),  # U+017F LATIN SMALL LETTER LONG S
+        ("KEEP", "keep"),  # U+212A KELVIN SIGN
+        ("İdiot", "idiot"),  # U+0130 lowers to "i" plus a combining dot
+        ("ıdiot", "idiot"),  # U+0131 LATIN SMALL LETTER DOTLESS I
+        ("Ärger", "ärger"),
+    ],
+)
+def test_fold_case(text, expected):
+    assert fold_case(text) == expected
+
+
+def test_build_literal_prefilter_drops_literals_containing_shorter_ones():
+    prefilter = build_literal_prefilter({"f": r"\b(fuck|fucking)\b", "p": "Please"})
+    assert prefilter == ("fuck", "please")
+
+
+@pytest.mark.parametrize(
+    "patterns",
+    [
+        {"any": r"\d+"},
+        {"class": "[Yy]es", "plain": "please"},
+        {"non_ascii": "größe"},
+    ],
+)
+def test_build_literal_prefilter_disabled(patterns):
+    assert build_literal_prefilter(patterns) is None
+
+
+PREFILTER_PATTERNS = {
+    "absolutely": "You're absolutely right",
+    "please": r"\bplease\b",
+    "thanks": r"\b(thanks|thank you|thx)\b",
+    "keep": "keep",
+    "idiot": r"\b(idiot|idiotic?)\b",
+    "colour": "colou?r",
+    "grouped": "(a[^]|]|b)c",
+}
+
+PREFILTER_TEXTS = [
+    "You're absolutely right!",
+    "you're ABSOLUTELY right",
+    "You're abſolutely right",
+    "PLEASE",
+    "pleaſe",
+    "Thank you",
+    "THX",
+    "Keep going",
+    "İdiot",
+    "ıdiot",
+    "color",
+    "a]c",
+    "bc",
+    "nothing here",
+]
+
+
+@pytest.mark.parametrize("text", PREFILTER_TEXTS)
+def test_prefilter_never_rejects_a_matching_text(text):
+    prefilter = build_literal_prefilter(PREFILTER_PATTERNS)
+    assert prefilter is not None
+    lowered = fold_case(text)
+    for pattern in PREFILTER_PATTERNS.values():
+        if re.search(pattern, text, re.IGNORECASE):
+            assert any(literal in lowered for literal in prefilter), pattern
@@ -0,0 +1,51 @@
+"""Tests for the prompt words watcher's startup backfill."""
+import importlib.util
+import json
+import os
+
+import counter_core
+import word_counter
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+
+def load_watcher():
+    """Import prompt_words/watcher.py by path (scripts/watcher.py has the same name)"""
+    path = os.path.join(SCRIPTS_DIR, "prompt_words", "watcher.py")
+    spec = importlib.util.spec_from_file_location("prompt_words_watcher", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def user(msg_id, timestamp, text):
+    return {"type": "user", "uuid": msg_id, "timestamp": timestamp, "message": {"content": text}}
+
+
+def test_backfill_today_words_counts_total_and_matches_in_one_pass(tmp_path, monkeypatch):
+    project = tmp_path / "-Users-dev-project"
+    project.mkdir()
+    today = [
+        user("0f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-02T09:00:00Z", "please fix it, thanks"),
+        user("1f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-02T10:00:00Z", "looks good"),
+    ]
+    (project / "one.jsonl").write_text(
+        "".join(json.dumps(entry) + "\n" for entry in today)
+        + json.dumps(user("2f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-01T09:00:00Z", "please")) + "\n"
+    )
+    # A resumed session repeats a message: counted once
+    (project / "two.jsonl").write_text(json.dumps(today[0]) + "\n")
+
+    watcher = load_watcher()
+    monkeypatch.setattr(counter_core, "CLAUDE_PROJECTS_BASE", str(tmp_path))
+    monkeypatch.setattr(watcher, "CLAUDE_PROJECTS_BASE", str(tmp_path))
+    monkeypatch.setattr(watcher, "get_utc_today", lambda: "2025-03-02")
+    monkeypatch.setattr(word_counter, "SCAN_CACHE_FILE", str(tmp_path / "scan_cache.sqlite"))
+
+    processed_ids = set()
+    total, word_matches = watcher.backfill_today_words(processed_ids)
+
+    assert total == 2
+    assert word_matches["please"] == 1
+    assert word_matches["thanks"] == 1
+    assert processed_ids == {counter_core.message_key(entry["uuid"]) for entry in today}
@@ -0,0 +1,45 @@
+"""Tests for the per-file SQLite scan cache."""
+from counter_core import scan_files_cached
+
+
+def count_lines(filepath):
+    with open(filepath) as f:
+        return [len(f.readlines())]
+
+
+def test_scan_files_cached_rescans_when_the_key_changes(tmp_path, monkeypatch):
+    session = tmp_path / "session.jsonl"
+    session.write_text("{}\n{}\n")
+    cache_file = str(tmp_path / "cache.sqlite")
+    calls = []
+
+    def fake_parallel(scan_file, file_list):
+        calls.append(list(file_list))
+        return [scan_file(filepath) for filepath in file_list]
+
+    monkeypatch.setattr("counter_core.scan_files_parallel", fake_parallel)
+
+    assert scan_files_cached(count_lines, [session], cache_file, "re") == [[2]]
+    assert scan_files_cached(count_lines, [session], cache_file, "re") == [[2]]
+    assert calls[-1] == []
+
+    assert scan_files_cached(count_lines, [session], cache_file, "hyperscan") == [[2]]
+    assert calls[-1] == [str(session)]
+
+
+def test_scan_files_cached_rescans_after_a_version_bump(tmp_path, monkeypatch):
+    session = tmp_path / "session.jsonl"
+    session.write_text("{}\n")
+    cache_file = str(tmp_path / "cache.sqlite")
+    calls = []
+
+    def fake_parallel(scan_file, file_list):
+        calls.append(list(file_list))
+        return [scan_file(filepath) for filepath in file_list]
+
+    monkeypatch.setattr("counter_core.scan_files_parallel", fake_parallel)
+
+    scan_files_cached(count_lines, [session], cache_file, "key")
+    monkeypatch.setattr("counter_core.SCAN_CACHE_VERSION", 999)
+    scan_files_cached(count_lines, [session], cache_file, "key")
+    assert calls[-1] == [str(session)]
@@ -0,0 +1,129 @@
+"""The unified scan must count exactly what the two separate backfills count."""
+import importlib.util
+import json
+import os
+import shutil
+
+import pytest
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+PROJECTS_DIR = os.environ["CLAUDE_PROJECTS"]
+
+
+def load_script(name, path):
+    """Import a script by path (both backfills are called backfill.py)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def assistant(msg_id, timestamp, *texts):
+    return {
+        "type": "assistant",
+        "uuid": msg_id,
+        "timestamp": timestamp,
+        "message": {"content": [{"type": "text", "text": text} for text in texts]},
+    }
+
+
+def user(msg_id, timestamp, content):
+    return {"type": "user", "uuid": msg_id, "timestamp": timestamp, "message": {"content": content}}
+
+
+SESSIONS = {
+    "-Users-dev-project-a/one.jsonl": [
+        assistant("0f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-01T10:00:00Z", "You're absolutely right!"),
+        assistant("1f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-01T11:00:00Z", "Perfect! Excellent!"),
+        user("2f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-01T09:00:00Z", "please fix it, thanks"),
+        user("3f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-02T09:00:00Z",
+             [{"type": "text", "text": "you fucking idiot"}]),
+    ],
+    "-Users-dev-project-a/two.jsonl": [
+        # The same message again (a resumed session): counted once
+        assistant("0f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-01T10:00:00Z", "You're absolutely right!"),
+        assistant("4F8FAD5B-D9CB-469F-A165-70867728950E", "2025-03-02T10:00:00Z", "You are right", "Perfect!"),
+    ],
+    "-Users-dev-project-b/three.jsonl": [
+        assistant("req_011CTbq8Xa6XFZ3pqBSjH9YR", "2025-03-02T12:00:00Z", "You're completely right."),
+        user("5f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-02T13:00:00Z", "thx, please continue"),
+        user("2f8fad5b-d9cb-469f-a165-70867728950e", "2025-03-01T09:00:00Z", "please fix it, thanks"),
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def projects():
+    for relative_path, entries in SESSIONS.items():
+        path = os.path.join(PROJECTS_DIR, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+    yield PROJECTS_DIR
+    shutil.rmtree(PROJECTS_DIR)
+
+
+@pytest.mark.parametrize("run", ["cold cache", "warm cache"])
+def test_unified_scan_matches_the_separate_backfills(projects, run):
+    import unified_scan
+
+    pattern_backfill = load_script("pattern_backfill", os.path.join(SCRIPTS_DIR, "backfill.py"))
+    word_backfill = load_script(
+        "word_backfill", os.path.join(SCRIPTS_DIR, "prompt_words", "backfill.py")
+    )
+
+    pattern_results, word_results = unified_scan.scan_all_projects()
+
+    assert pattern_results == pattern_backfill.scan_all_projects()
+    assert word_results == word_backfill.scan_all_projects()
+
+    daily_counts, project_breakdown, total_messages_per_day = pattern_results
+    assert daily_counts["absolutely"] == {"2025-03-01": 1, "2025-03-02": 1}
+    assert total_messages_per_day == {"2025-03-01": 2, "2025-03-02": 2}
+    daily_word_counts, total_user_messages_per_day = word_results
+    assert daily_word_counts["please"] == {"2025-03-01": 1, "2025-03-02": 1}
+    assert total_user_messages_per_day == {"2025-03-01": 1, "2025-03-02": 2}
+
+
+PATTERN_RECORDS = [
+    {"day": "2025-01-01", "absolutely": 1, "total_messages": 10},
+    {"day": "2025-01-02", "absolutely": 2, "total_messages": 20},
+]
+
+
+def test_print_upload_results_does_not_count_stop_as_failed(capsys):
+    import unified_scan
+
+    success, failed = unified_scan.print_upload_results(
+        "Patterns", PATTERN_RECORDS, [True, "STOP"], "total_messages"
+    )
+
+    assert (success, failed) == (1, 0)
+    assert "authorization failed" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("pattern_results", [["STOP"], [True, "STOP"]])
+def test_upload_stops_after_unauthorized_pattern_upload(monkeypatch, capsys, tmp_path, pattern_results):
+    import unified_scan
+
+    word_uploads = []
+    monkeypatch.setattr(unified_scan.sys, "argv", ["unified_scan.py", "--upload", "http://server", "s"])
+    monkeypatch.setattr("builtins.input", lambda prompt: "y")
+    monkeypatch.setattr(unified_scan, "scan_all_projects", lambda: (({}, {}, {}), ({}, {})))
+    monkeypatch.setattr(unified_scan.claude_counter, "build_upload_records", lambda *args: PATTERN_RECORDS)
+    monkeypatch.setattr(
+        unified_scan.word_counter, "build_upload_records",
+        lambda *args: [{"day": "2025-01-01", "please": 1, "total_user_messages": 5}],
+    )
+    monkeypatch.setattr(
+        unified_scan.claude_counter, "upload_to_api_bulk", lambda *args: pattern_results
+    )
+    monkeypatch.setattr(
+        unified_scan.word_counter, "upload_to_api_bulk", lambda *args: word_uploads.append(args)
+    )
+    monkeypatch.setattr(unified_scan, "CLAUDE_PROJECTS_BASE", str(tmp_path))
+
+    unified_scan.main()
+
+    assert word_uploads == []
+    assert "Upload stopped: authorization failed" in capsys.readouterr().out
@@ -0,0 +1,81 @@
+"""Tests for the bulk upload clients and their per-day fallback."""
+import pytest
+
+import claude_counter
+import word_counter
+
+PATTERN_RECORDS = [
+    {"day": "2025-01-01", "absolutely": 1, "total_messages": 10},
+    {"day": "2025-01-02", "absolutely": 2, "total_messages": 20},
+]
+WORD_RECORDS = [
+    {"day": "2025-01-01", "please": 1, "total_user_messages": 5},
+    {"day": "2025-01-02", "please": 3, "total_user_messages": 6},
+]
+
+
+def fake_server(monkeypatch, module, bulk_status, set_status=200):
+    """Answer the module's POSTs with fixed statuses; return the (url, data) requests"""
+    requests = []
+
+    def post_json(url, data):
+        requests.append((url, data))
+        return (bulk_status if "bulk" in url else set_status), "ok"
+
+    monkeypatch.setattr(module, "post_json", post_json)
+    monkeypatch.setattr(module, "log_upload", lambda *args, **kwargs: None)
+    return requests
+
+
+def test_pattern_bulk_upload_sends_one_request(monkeypatch):
+    requests = fake_server(monkeypatch, claude_counter, bulk_status=200)
+
+    assert claude_counter.upload_to_api_bulk("http://server", "s", PATTERN_RECORDS) == [True, True]
+    assert [url for url, _ in requests] == ["http://server/api/set_bulk"]
+    assert requests[0][1]["days"] == PATTERN_RECORDS
+    assert requests[0][1]["secret"] == "s"
+
+
+@pytest.mark.parametrize("status", [404, 405])
+def test_pattern_bulk_upload_falls_back_to_one_request_per_day(monkeypatch, status):
+    requests = fake_server(monkeypatch, claude_counter, bulk_status=status)
+
+    assert claude_counter.upload_to_api_bulk("http://server", "s", PATTERN_RECORDS) == [True, True]
+
+    per_day = sorted((data["day"], data["absolutely"], data["total_messages"])
+                     for url, data in requests if url == "http://server/api/set")
+    assert per_day == [("2025-01-01", 1, 10), ("2025-01-02", 2, 20)]
+
+
+def test_pattern_bulk_upload_stops_on_unauthorized(monkeypatch):
+    requests = fake_server(monkeypatch, claude_counter, bulk_status=401)
+
+    assert claude_counter.upload_to_api_bulk("http://server", "s", PATTERN_RECORDS) == ["STOP"]
+    assert len(requests) == 1
+
+
+def test_pattern_fallback_stops_after_an_unauthorized_day(monkeypatch):
+    requests = fake_server(monkeypatch, claude_counter, bulk_status=404, set_status=401)
+
+    results = claude_counter.upload_to_api_bulk("http://server", "s", PATTERN_RECORDS)
+    assert results[0] == "STOP"
+    # The first day goes alone, so a wrong secret costs one request per endpoint
+    assert len(requests) == 2
+
+
+def test_word_bulk_upload_sends_one_request(monkeypatch):
+    requests = fake_server(monkeypatch, word_counter, bulk_status=200)
+
+    assert word_counter.upload_to_api_bulk("http://server", "s", WORD_RECORDS) == [True, True]
+    assert [url for url, _ in requests] == ["http://server/api/things-i-tell-claude/bulk-set"]
+
+
+@pytest.mark.parametrize("status", [404, 405])
+def test_word_bulk_upload_falls_back_to_one_request_per_day(monkeypatch, status):
+    requests = fake_server(monkeypatch, word_counter, bulk_status=status)
+
+    assert word_counter.upload_to_api_bulk("http://server", "s", WORD_RECORDS) == [True, True]
+
+    per_day = sorted((data["day"], data["please"], data["total_user_messages"])
+                     for url, data in requests if url == "http://server/api/things-i-tell-claude/set")
+    assert per_day == [("2025-01-01", 1, 5), ("2025-01-02", 3, 6)]
@@ -0,0 +1,45 @@
+"""Tests for the prompt words counter."""
+import pytest
+
+import counter_core
+import word_counter
+
+
+@pytest.fixture
+def tracked_words(monkeypatch):
+    """Replace the configured tracked words with `words` (name -> regex)"""
+    def configure(words):
+        monkeypatch.setattr(word_counter, "TRACKED_WORDS", words)
+        monkeypatch.setattr(word_counter, "TRACKED_NAMES", list(words))
+        monkeypatch.setattr(word_counter, "TRACKED_MATCHER", counter_core.build_pattern_matcher(words))
+    return configure
+
+
+@pytest.mark.parametrize(
+    "words, text, expected",
+    [
+        ({"please": r"\bplease\b", "ease": "ease"}, "please", ["please", "ease"]),
+        ({"ease": "ease", "please": r"\bplease\b"}, "please", ["ease", "please"]),
+        ({"thanks": r"\b(thanks|thank you)\b", "thank": "thank"}, "Thank you!", ["thanks", "thank"]),
+        ({"thank": "thank", "thanks": r"\b(thanks|thank you)\b"}, "thanks", ["thank", "thanks"]),
+        ({"please": r"\bplease\b", "ease": "ease"}, "with ease", ["ease"]),
+        ({"please": r"\bplease\b", "ease": "ease"}, "nothing", []),
+    ],
+)
+def test_match_tracked_words_reports_overlapping_words(tracked_words, words, text, expected):
+    tracked_words(words)
+    assert list(word_counter.match_tracked_words(text)) == expected
+
+
+def test_scan_user_message_entry_counts_overlapping_words(tracked_words):
+    tracked_words({"please": r"\bplease\b", "ease": "ease"})
+    entry = {
+        "type": "user",
+        "uuid": "11111111-2222-3333-4444-555555555555",
+        "timestamp": "2025-01-02T03:04:05Z",
+        "message": {"content": [{"type": "text", "text": "Please fix it"}]},
+    }
+    message = word_counter.scan_user_message_entry(entry)
+    assert message.date_str == "2025-01-02"
+    assert message.words == ("please", "ease")
+    assert message.first_match_text == "Please fix it"